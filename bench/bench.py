@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Bench hors ligne : chaîne complète (listage, vérification Drive, téléchargement, upload)
+contre de faux yt-dlp / rclone, sans réseau.
+
+Chaque cas lance src/cli.py dans un dossier temporaire et mesure la durée totale, le nombre
+de processus lancés, la mémoire max (RSS) du CLI et l'espace disque max du dossier de sortie.
+Linux/macOS (les faux binaires sont des scripts shell).
+
+    python bench/bench.py --entries 100 1000 10000 --existing 0.5
+    python bench/bench.py --entries 1000 --save base.json
+    python bench/bench.py --entries 1000 --baseline base.json   # code 1 si régression
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+from progress import format_bytes  # noqa: E402
+
+CLI = SRC_DIR / "cli.py"
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLbench"
+REMOTE_FOLDER = "Bench"
+
+# Mesures comparées à la référence (--baseline) : plus grand = moins bien
+COMPARED = ("wall_time", "subprocesses", "peak_rss", "disk_peak")
+
+
+def write_wrapper(bin_dir, name, script):
+    """Exécutable "yt-dlp" / "rclone" qui lance le faux script Python"""
+    path = bin_dir / name
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n')
+    path.chmod(0o755)
+    return path
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass  # fichier renommé ou supprimé entre-temps
+    return total
+
+
+def read_hwm(pid):
+    """Mémoire max (VmHWM) d'un processus en octets, ou None hors Linux"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class Monitor(threading.Thread):
+    """Échantillonne la mémoire du CLI et l'espace occupé par le dossier de sortie"""
+
+    def __init__(self, pid, out_dir, interval=0.1):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.out_dir = out_dir
+        self.interval = interval
+        self.peak_rss = 0
+        self.disk_peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak_rss = max(self.peak_rss, read_hwm(self.pid) or 0)
+            self.disk_peak = max(self.disk_peak, dir_size(self.out_dir))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def fake_config(args, entries, root):
+    return {
+        "entries": entries,
+        "reverse": args.reverse,
+        "file_size": args.file_size,
+        "duration": 600,
+        "startup": args.startup,
+        "throughput": args.throughput,
+        "extract_latency": args.extract_latency,
+        "short_rate": args.short_rate,
+        "fail_rate": args.fail_rate,
+        "rate_limit_rate": args.rate_limit_rate,
+        "permanent_rate": args.permanent_rate,
+        "rclone_latency": args.rclone_latency,
+        "rclone_throughput": args.rclone_throughput,
+        "list_latency": args.list_latency,
+        "remote_dir": str(root / "remote"),
+        "calls_log": str(root / "calls.log"),
+    }
+
+
+def run_case(args, entries):
+    root = Path(tempfile.mkdtemp(prefix=f"ytcutter-bench-{entries}-"))
+    bin_dir = root / "bin"
+    bin_dir.mkdir()
+    ytdlp = write_wrapper(bin_dir, "yt-dlp", BENCH_DIR / "fake_ytdlp.py")
+    write_wrapper(bin_dir, "rclone", BENCH_DIR / "fake_rclone.py")
+    config_file = root / "config.json"
+    config_file.write_text(json.dumps(fake_config(args, entries, root), indent=2))
+
+    # Une partie des fichiers est déjà sur le "Drive" (chemin de vérification)
+    remote = root / "remote" / REMOTE_FOLDER
+    remote.mkdir(parents=True)
+    for i in range(1, int(entries * args.existing) + 1):
+        (remote / f"{i:03d} - Bench video {i}.mp4").write_text(str(args.file_size // 20))
+
+    out_dir = root / "out"
+    out_dir.mkdir()
+    cmd = [
+        sys.executable, str(CLI), PLAYLIST_URL, "--mode", "playlist",
+        "-o", str(out_dir), "--start", "0", "--end", "30",
+        "--remote", "bench", "--folder", REMOTE_FOLDER,
+        "--download-workers", str(args.workers), "--upload-workers", str(args.upload_workers),
+        "--retries", str(args.retries),
+    ]
+    cmd += ["--bulk"] if args.bulk else []
+    cmd += [] if args.no_pipeline else ["--pipeline"]
+    cmd += [] if args.keep_local else ["--delete-local"]
+    cmd += args.cli_args
+    env = dict(
+        os.environ,
+        PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        YTCUTTER_YTDLP=str(ytdlp),
+        YTCUTTER_DATA_DIR=str(root / "data"),
+        BENCH_CONFIG=str(config_file),
+    )
+
+    started = time.monotonic()
+    with open(root / "run.log", "w", encoding="utf-8") as log:
+        process = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        monitor = Monitor(process.pid, out_dir)
+        monitor.start()
+        code = process.wait()
+        monitor.stop()
+    wall = time.monotonic() - started
+
+    calls = Counter((root / "calls.log").read_text().splitlines()) if (root / "calls.log").exists() else Counter()
+    summaries = sorted((root / "data" / "jobs" / "metrics").glob("*.json"))
+    metrics = json.loads(summaries[-1].read_text()) if summaries else {}
+    # Hors Linux : maximum des processus enfants terminés (le CLI est le plus gros)
+    peak_rss = monitor.peak_rss or resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * (
+        1 if sys.platform == "darwin" else 1024)
+
+    report = {
+        "entries": entries,
+        "exit_code": code,
+        "wall_time": wall,
+        # Les appels à une session rclone rcd ne lancent pas de processus
+        "subprocesses": sum(n for call, n in calls.items() if not call.startswith("rclone-rc ")),
+        "calls": dict(calls),
+        "peak_rss": peak_rss,
+        "disk_peak": monitor.disk_peak,
+        "uploaded": sum(1 for _ in remote.iterdir()),
+        "stages": {name: round(s["total"], 3) for name, s in metrics.get("stages", {}).items()},
+        "work_dir": str(root),
+    }
+    if not args.keep:
+        shutil.rmtree(root, ignore_errors=True)
+    return report
+
+
+def print_report(report):
+    calls = ", ".join(f"{n} {name}" for name, n in sorted(report["calls"].items()))
+    stages = ", ".join(f"{name} {t:.2f}s" for name, t in report["stages"].items())
+    print(f"\n=== {report['entries']} vidéo(s) — code {report['exit_code']} ===")
+    print(f"   Durée totale : {report['wall_time']:.2f}s")
+    print(f"   Processus    : {report['subprocesses']} ({calls})")
+    print(f"   RSS max CLI  : {format_bytes(report['peak_rss'])}")
+    print(f"   Disque max   : {format_bytes(report['disk_peak'])}")
+    print(f"   Sur le remote: {report['uploaded']} fichier(s)")
+    print(f"   Étapes       : {stages}")
+
+
+def compare(reports, baseline, tolerance):
+    """Liste des régressions par rapport à la référence (même nombre de vidéos)"""
+    previous = {r["entries"]: r for r in baseline}
+    regressions = []
+    for report in reports:
+        old = previous.get(report["entries"])
+        if not old:
+            continue
+        for key in COMPARED:
+            if old.get(key) and report[key] > old[key] * (1 + tolerance):
+                regressions.append(f"{report['entries']} vidéo(s): {key} {old[key]:.6g} -> {report[key]:.6g} "
+                                   f"(+{100 * (report[key] / old[key] - 1):.0f}%)")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bench hors ligne de youtube-cutter (faux yt-dlp / rclone)")
+    parser.add_argument("--entries", type=int, nargs="+", default=[100], help="Tailles de playlist (défaut 100)")
+    parser.add_argument("--existing", type=float, default=0.0, help="Part des fichiers déjà sur le remote (0-1)")
+    parser.add_argument("--workers", type=int, default=4, help="Téléchargements parallèles (défaut 4)")
+    parser.add_argument("--upload-workers", type=int, default=4, help="Uploads parallèles (défaut 4)")
+    parser.add_argument("--bulk", action="store_true", help="Upload groupé (--files-from)")
+    parser.add_argument("--no-pipeline", action="store_true", help="Upload par batchs à la fin")
+    parser.add_argument("--keep-local", action="store_true", help="Ne pas supprimer les fichiers après upload")
+    parser.add_argument("--retries", type=int, default=3, help="Nouveaux essais (défaut 3)")
+
+    fakes = parser.add_argument_group("faux yt-dlp / rclone")
+    fakes.add_argument("--file-size", type=int, default=2_000_000, help="Taille d'une vidéo complète (octets)")
+    fakes.add_argument("--startup", type=float, default=0.05, help="Latence de lancement d'un processus (s)")
+    fakes.add_argument("--throughput", type=float, default=50e6, help="Débit de téléchargement (octets/s)")
+    fakes.add_argument("--extract-latency", type=float, default=0.0, help="Extraction des infos d'une vidéo (s)")
+    fakes.add_argument("--short-rate", type=float, default=0.0, help="Part des vidéos plus courtes que la plage")
+    fakes.add_argument("--rclone-latency", type=float, default=0.2, help="Coût fixe d'un rclone copy (s)")
+    fakes.add_argument("--rclone-throughput", type=float, default=20e6, help="Débit d'upload (octets/s)")
+    fakes.add_argument("--list-latency", type=float, default=0.5, help="Coût fixe d'un rclone lsjson (s)")
+    fakes.add_argument("--fail-rate", type=float, default=0.0, help="Probabilité d'erreur temporaire")
+    fakes.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probabilité de 429")
+    fakes.add_argument("--permanent-rate", type=float, default=0.0, help="Part de vidéos indisponibles")
+    fakes.add_argument("--reverse", action="store_true", help="Playlist réordonnée (noms de fichiers changés)")
+
+    out = parser.add_argument_group("résultats")
+    out.add_argument("--save", metavar="FICHIER", help="Enregistrer les résultats (JSON)")
+    out.add_argument("--baseline", metavar="FICHIER", help="Comparer à des résultats enregistrés")
+    out.add_argument("--tolerance", type=float, default=0.2, help="Écart toléré avant régression (défaut 0.2)")
+    out.add_argument("--keep", action="store_true", help="Garder les dossiers temporaires")
+    parser.add_argument("cli_args", nargs=argparse.REMAINDER,
+                        help="Options supplémentaires pour cli.py, après --")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.cli_args[:1] == ["--"]:
+        args.cli_args = args.cli_args[1:]
+
+    reports = []
+    for entries in args.entries:
+        report = run_case(args, entries)
+        print_report(report)
+        reports.append(report)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(reports, indent=2))
+    if args.baseline:
+        regressions = compare(reports, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"⚠️ Régression: {line}")
+        if regressions:
+            return 1
+        print("✅ Pas de régression")
+    return 1 if any(r["exit_code"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Faux rclone pour le bench : le remote est un dossier local de fichiers-témoins.
+
+Chaque fichier "uploadé" est un petit fichier contenant sa taille, ce qui suffit à
+lsjson (vérification Drive, confirmation des uploads) sans recopier les octets.
+Sous-commandes reproduites : listremotes, lsjson (dossier ou --files-from-raw),
+copy (fichier seul ou --files-from-raw), moveto, cat et rcat (manifeste), et rcd
+(API rc locale : operations/list, stat, copyfile, movefile).
+"""
+import base64
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from fakes import load_config, record_call  # noqa: E402
+
+REMOTE_NAME = "bench"
+# Fichiers remplacés par un fichier-témoin sur le remote (les autres sont copiés tels quels)
+MEDIA_SUFFIXES = {".mp4", ".mp3", ".m4a", ".webm", ".mkv"}
+
+
+def remote_path(cfg, dest):
+    _, _, path = dest.partition(":")
+    return Path(cfg["remote_dir"]) / path.strip("/")
+
+
+def remote_size(path):
+    """Taille d'un fichier-témoin (ou taille réelle pour un fichier écrit par rcat)"""
+    text = path.read_text()
+    return int(text) if text.isdigit() else path.stat().st_size
+
+
+def not_found(path):
+    sys.stderr.write(f"ERROR : {path.name}: object not found\n")
+    return 3
+
+
+def lsjson(cfg, args):
+    folder = remote_path(cfg, next(a for a in args if ":" in a))
+    if "--files-from-raw" in args:
+        # Recherche directe de quelques fichiers : pas de listing du dossier
+        names = Path(args[args.index("--files-from-raw") + 1]).read_text(encoding="utf-8").split("\n")
+        time.sleep(cfg["rclone_latency"])
+        paths = [folder / n for n in names if n]
+        print(json.dumps([{"Path": p.name, "Name": p.name, "Size": remote_size(p), "ModTime": "", "IsDir": False}
+                          for p in paths if p.is_file()]))
+        return 0
+    time.sleep(cfg["list_latency"])
+    if not folder.is_dir():
+        sys.stderr.write("ERROR : error listing: directory not found\n")
+        return 3
+    entries = [
+        {"Path": p.name, "Name": p.name, "Size": remote_size(p), "ModTime": "", "IsDir": False}
+        for p in folder.iterdir() if p.is_file()
+    ]
+    # Coût du listing proportionnel au nombre de fichiers (pagination de l'API Drive)
+    time.sleep(len(entries) / 5000)
+    print(json.dumps(entries))
+    return 0
+
+
+def upload(cfg, source, folder, rng):
+    """Copie simulée d'un fichier ; retourne un message d'erreur ou None"""
+    roll = rng.random()
+    if roll < cfg["rate_limit_rate"]:
+        return "googleapi: Error 403: User rate limit exceeded., userRateLimitExceeded"
+    if roll < cfg["rate_limit_rate"] + cfg["fail_rate"]:
+        return "Post \"https://www.googleapis.com/upload/drive/v3/files\": connection reset by peer"
+    size = source.stat().st_size
+    if cfg["rclone_throughput"]:
+        time.sleep(size / cfg["rclone_throughput"])
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / source.name).write_text(str(size))
+    return None
+
+
+def copy(cfg, args, rng):
+    positional = [a for i, a in enumerate(args) if not a.startswith("-")
+                  and (i == 0 or args[i - 1] not in ("--files-from-raw", "--transfers", "--checkers"))]
+    source, dest = Path(positional[0]), positional[1]
+    folder = remote_path(cfg, dest)
+    time.sleep(cfg["rclone_latency"])
+
+    if "--files-from-raw" in args:
+        names = Path(args[args.index("--files-from-raw") + 1]).read_text(encoding="utf-8").split("\n")
+        files = [source / n for n in names if n]
+    else:
+        files = [source]
+
+    errors = [e for e in (upload(cfg, f, folder, rng) for f in files) if e]
+    for error in errors:
+        sys.stderr.write(f"ERROR : Failed to copy: {error}\n")
+    return 1 if errors else 0
+
+
+def moveto(cfg, args):
+    source, dest = remote_path(cfg, args[0]), remote_path(cfg, args[1])
+    time.sleep(cfg["rclone_latency"])
+    if not source.is_file():
+        return not_found(source)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    source.replace(dest)
+    return 0
+
+
+def cat(cfg, args):
+    path = remote_path(cfg, args[0])
+    time.sleep(cfg["rclone_latency"])
+    if not path.is_file():
+        return not_found(path)
+    sys.stdout.write(path.read_text())
+    return 0
+
+
+def rcat(cfg, args):
+    path = remote_path(cfg, args[0])
+    time.sleep(cfg["rclone_latency"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(sys.stdin.read())
+    return 0
+
+
+def fs_path(cfg, fs, remote):
+    """Chemin local d'un couple (fs, remote) de l'API rc : le remote de bench ou un dossier local"""
+    if fs.rstrip(":") == REMOTE_NAME:
+        return Path(cfg["remote_dir"]) / remote.strip("/")
+    return Path(fs) / remote
+
+
+class RcError(Exception):
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+def rc_list(cfg, rng, params):
+    folder = fs_path(cfg, params["fs"], params.get("remote", ""))
+    time.sleep(cfg["list_latency"] / 5)  # connexion déjà ouverte
+    if not folder.is_dir():
+        raise RcError("directory not found", 404)
+    entries = [{"Path": p.name, "Name": p.name, "Size": remote_size(p), "ModTime": "", "IsDir": False}
+               for p in folder.iterdir() if p.is_file()]
+    time.sleep(len(entries) / 5000)
+    return {"list": entries}
+
+
+def rc_stat(cfg, rng, params):
+    path = fs_path(cfg, params["fs"], params["remote"])
+    time.sleep(cfg["rclone_latency"] / 5)  # connexion déjà ouverte
+    if not path.is_file():
+        return {"item": None}
+    return {"item": {"Path": path.name, "Name": path.name, "Size": remote_size(path), "ModTime": "", "IsDir": False}}
+
+
+def rc_copyfile(cfg, rng, params):
+    source = fs_path(cfg, params["srcFs"], params["srcRemote"])
+    dest = fs_path(cfg, params["dstFs"], params["dstRemote"])
+    if not source.is_file():
+        raise RcError("object not found", 404)
+    to_remote = params["dstFs"].rstrip(":") == REMOTE_NAME
+    if to_remote and source.suffix in MEDIA_SUFFIXES:
+        error = upload(cfg, source, dest.parent, rng)
+        if error:
+            raise RcError(error)
+        if dest.name != source.name:
+            (dest.parent / source.name).replace(dest)
+        return {}
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, dest)
+    return {}
+
+
+def rc_movefile(cfg, rng, params):
+    source = fs_path(cfg, params["srcFs"], params["srcRemote"])
+    if not source.is_file():
+        raise RcError("object not found", 404)
+    dest = fs_path(cfg, params["dstFs"], params["dstRemote"])
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    source.replace(dest)
+    return {}
+
+
+RC_COMMANDS = {
+    "rc/noop": lambda cfg, rng, params: params,
+    "operations/list": rc_list,
+    "operations/stat": rc_stat,
+    "operations/copyfile": rc_copyfile,
+    "operations/movefile": rc_movefile,
+}
+
+
+def rcd(cfg, args):
+    """Serveur rc minimal : mêmes réponses JSON et mêmes erreurs que `rclone rcd`"""
+    options = dict(zip(args[::2], args[1:][::2]))
+    host, _, port = options["--rc-addr"].rpartition(":")
+    # Comme rclone : options --rc-user / --rc-pass ou variables RCLONE_RC_USER / RCLONE_RC_PASS
+    user = options.get("--rc-user", os.environ.get("RCLONE_RC_USER", ""))
+    password = options.get("--rc-pass", os.environ.get("RCLONE_RC_PASS", ""))
+    expected = "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+    rng = random.Random()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            command = self.path.strip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if self.headers.get("Authorization") != expected:
+                return self.reply(401, {"error": "authentication required", "status": 401})
+            record_call(cfg, "rclone-rc", command)
+            if command == "core/quit":
+                self.reply(200, {})
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+            handler = RC_COMMANDS.get(command)
+            if not handler:
+                return self.reply(404, {"error": "couldn't find method", "status": 404})
+            try:
+                self.reply(200, handler(cfg, rng, params))
+            except RcError as e:
+                self.reply(e.status, {"error": str(e), "input": params, "path": command, "status": e.status})
+
+        def reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.serve_forever()
+    return 0
+
+
+def main(argv):
+    cfg = load_config()
+    command = argv[0] if argv else ""
+    record_call(cfg, "rclone", command)
+    rng = random.Random()
+    if command == "listremotes":
+        print(f"{REMOTE_NAME}:")
+        return 0
+    if command == "lsjson":
+        return lsjson(cfg, argv[1:])
+    if command == "copy":
+        return copy(cfg, argv[1:], rng)
+    if command in ("moveto", "cat", "rcat", "rcd"):
+        return {"moveto": moveto, "cat": cat, "rcat": rcat, "rcd": rcd}[command](cfg, argv[1:])
+    sys.stderr.write(f"fake rclone: commande non gérée: {command}\n")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
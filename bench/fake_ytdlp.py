@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Faux yt-dlp pour le bench : aucune requête réseau, comportement réglé par BENCH_CONFIG.
+
+Reproduit uniquement ce que le moteur utilise : listage --flat-playlist, téléchargement
+avec --download-sections, --print (before_dl / after_move), --progress-template,
+--download-archive, --playlist-items / --playlist-end, -o (et -o "infojson:..."),
+--write-info-json et --load-info-json.
+"""
+import json
+import random
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from fakes import load_config, record_call  # noqa: E402
+
+# Options suivies d'une valeur
+VALUE_OPTIONS = {
+    "-f", "-o", "--print", "--download-archive", "--download-sections", "--progress-template",
+    "--progress-delta", "--playlist-items", "--playlist-end", "--ffmpeg-location", "--audio-format",
+    "--load-info-json",
+}
+# Types de fichiers annexes acceptés en préfixe de -o (-o "infojson:modèle")
+OUTPUT_TYPES = {"infojson"}
+
+FIELD_RE = re.compile(r"%\(([^)]+)\)(0?\d*)([sdj])")
+
+
+def parse_args(argv):
+    options, flags, positional = {}, set(), []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            positional += argv[i + 1:]
+            break
+        if arg in VALUE_OPTIONS and i + 1 < len(argv):
+            options.setdefault(arg, []).append(argv[i + 1])
+            i += 2
+            continue
+        if arg.startswith("-"):
+            flags.add(arg)
+        else:
+            positional.append(arg)
+        i += 1
+    return options, flags, positional
+
+
+def render(template, fields):
+    def field(match):
+        name, width, conv = match.groups()
+        if name.startswith("progress."):
+            return json.dumps(fields.get("progress", {}))
+        value = fields.get(name, "NA")
+        if conv == "d" and isinstance(value, int):
+            return f"{value:{width}d}"
+        return str(value)
+    return FIELD_RE.sub(field, template)
+
+
+def video_number(cfg, index):
+    """Vidéo à cette position de la playlist"""
+    return cfg["entries"] + 1 - index if cfg["reverse"] else index
+
+
+def video_id(cfg, index):
+    return f"bv{video_number(cfg, index):09d}"
+
+
+def video_title(cfg, index):
+    return f"Bench video {video_number(cfg, index)}"
+
+
+def video_duration(cfg, vid):
+    """Durée d'une vidéo : quelques vidéos courtes (toujours les mêmes) selon short_rate"""
+    if zlib.crc32(b"short" + vid.encode()) % 10000 < cfg["short_rate"] * 10000:
+        return 20
+    return cfg["duration"]
+
+
+def output_templates(options):
+    """Modèles -o par type ("" = fichier principal)"""
+    templates = {}
+    for value in options.get("-o", []):
+        kind, _, rest = value.partition(":")
+        if kind in OUTPUT_TYPES and rest:
+            templates[kind] = rest
+        else:
+            templates[""] = value
+    return templates
+
+
+def write_info(cfg, template, fields):
+    """Infos de l'extracteur, comme --write-info-json (liens valables 6 h)"""
+    expire = int(time.time()) + 6 * 3600
+    info = {
+        "_type": "video", "id": fields["id"], "title": fields["title"], "duration": fields["duration"],
+        "upload_date": "20240101", "playlist_index": fields["playlist_index"],
+        "formats": [
+            {"format_id": "140", "ext": "m4a", "acodec": "mp4a.40.2", "vcodec": "none",
+             "url": f"https://bench.invalid/{fields['id']}/140?expire={expire}"},
+            {"format_id": "136", "ext": "mp4", "height": 720, "vcodec": "avc1", "acodec": "none",
+             "url": f"https://bench.invalid/{fields['id']}/136?expire={expire}"},
+        ],
+    }
+    path = Path(render(template, fields) + ".info.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(info))
+
+
+def parse_items(spec, count):
+    items = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        items += range(int(start), int(end or start) + 1)
+    return [i for i in items if 1 <= i <= count]
+
+
+def parse_sections(spec, duration):
+    if not spec:
+        return [(0.0, float(duration))]
+    sections = []
+    for part in spec.lstrip("*").split(","):
+        start, _, end = part.partition("-")
+        sections.append((float(start), min(float(end), float(duration))))
+    return sections
+
+
+def failure(cfg, vid, rng):
+    """Message d'erreur yt-dlp simulé pour cette vidéo, ou None"""
+    # Erreurs définitives : toujours les mêmes vidéos, quel que soit l'essai
+    if zlib.crc32(vid.encode()) % 10000 < cfg["permanent_rate"] * 10000:
+        return "Video unavailable. This video has been removed by the uploader"
+    roll = rng.random()
+    if roll < cfg["rate_limit_rate"]:
+        return "HTTP Error 429: Too Many Requests"
+    if roll < cfg["rate_limit_rate"] + cfg["fail_rate"]:
+        return "Unable to download video data: Connection reset by peer"
+    return None
+
+
+def list_entries(cfg, options, selected, single=False):
+    template = options.get("--print", ["%(id)s"])[-1]
+    out_template = options.get("-o", ["%(title)s"])[-1]
+    delay = cfg["list_rate"] and 1.0 / cfg["list_rate"]
+    for n, index in enumerate(selected, start=1):
+        vid = video_id(cfg, index)
+        fields = {"id": vid, "title": video_title(cfg, index), "playlist_index": "NA" if single else index,
+                  "duration": video_duration(cfg, vid)}
+        fields["filename"] = render(out_template, fields)
+        print(render(template, fields), flush=True)
+        if delay and n % 100 == 0:
+            time.sleep(delay * 100)
+    return 0
+
+
+def download(cfg, options, flags, selected, rng, single=False):
+    prints = options.get("--print", [])
+    progress = options.get("--progress-template", [])
+    progress = progress[-1].split(":", 1)[1] if progress and ":" in progress[-1] else None
+    templates = output_templates(options)
+    out_template = templates[""]
+    archive = Path(options["--download-archive"][-1]) if "--download-archive" in options else None
+    done = set(archive.read_text().split()) if archive and archive.exists() else set()
+    if "-x" in flags:
+        ext = options.get("--audio-format", ["mp3"])[-1]
+    elif options.get("-f", [""])[-1].startswith("bestaudio"):
+        ext = "m4a"  # audio brut, converti ensuite par le moteur
+    else:
+        ext = "mp4"
+    code = 0
+
+    for index in selected:
+        vid = video_id(cfg, index)
+        if vid in done:
+            print(f"[download] {vid}: has already been recorded in the archive", flush=True)
+            continue
+        # Extraction des infos (pages, lecteur, formats), sauf avec --load-info-json
+        if "--load-info-json" not in options:
+            time.sleep(cfg["extract_latency"])
+        duration = video_duration(cfg, vid)
+        error = failure(cfg, vid, rng)
+        if error:
+            time.sleep(cfg["fail_latency"])
+            print(f"ERROR: [youtube] {vid}: {error}", flush=True)
+            code = 1
+            continue
+
+        # Vidéo seule (URL watch?v=) : pas de position dans une playlist, comme yt-dlp
+        fields = {"id": vid, "title": video_title(cfg, index), "playlist_index": "NA" if single else index, "ext": ext,
+                  "duration": duration, "filesize_approx": cfg["file_size"]}
+        if "--write-info-json" in flags and "infojson" in templates:
+            write_info(cfg, templates["infojson"], fields)
+        sections = [(s, e) for s, e in parse_sections(options.get("--download-sections", [""])[-1], duration)
+                    if s < duration]
+        if not sections:
+            print(f"ERROR: [youtube] {vid}: --download-sections didn't find section in video", flush=True)
+            code = 1
+            continue
+        for start, end in sections:
+            size = int(cfg["file_size"] * (end - start) / duration)
+            fields.update(section_start=start, section_end=end)
+            for p in prints:
+                when, _, template = p.partition(":")
+                if when == "before_dl":
+                    print(render(template, fields), flush=True)
+
+            # Débit simulé, une ligne de progression tous les 0.25 s au plus
+            total_time = size / cfg["throughput"] if cfg["throughput"] else 0
+            started = time.monotonic()
+            while True:
+                elapsed = time.monotonic() - started
+                downloaded = size if elapsed >= total_time else int(size * elapsed / total_time)
+                if progress:
+                    status = "finished" if downloaded >= size else "downloading"
+                    fields["progress"] = {
+                        "status": status, "downloaded_bytes": downloaded, "total_bytes": size,
+                        "speed": cfg["throughput"], "eta": max(0.0, total_time - elapsed),
+                        "elapsed": elapsed, "_percent": 100.0 * downloaded / size if size else 100.0,
+                    }
+                    print(render(progress, {**fields, "info.id": vid}), flush=True)
+                if downloaded >= size:
+                    break
+                time.sleep(min(0.25, total_time - elapsed))
+
+            path = Path(render(out_template, fields))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Fichier creux de la bonne taille : la taille compte, pas le contenu
+            with open(path, "wb") as f:
+                f.truncate(size)
+            fields["filepath"] = str(path)
+            for p in prints:
+                when, _, template = p.partition(":")
+                if when == "after_move":
+                    print(render(template, fields), flush=True)
+
+        if archive:
+            with open(archive, "a", encoding="utf-8") as f:
+                f.write(f"youtube {vid}\n")
+    return code
+
+
+def main(argv):
+    cfg = load_config()
+    record_call(cfg, "yt-dlp", "list" if "--flat-playlist" in argv else "download")
+    rng = random.Random()
+    time.sleep(cfg["startup"])
+
+    options, flags, positional = parse_args(argv)
+    url = positional[-1] if positional else ""
+    if "--load-info-json" in options:
+        # Vidéo déjà extraite : son ID vient du fichier d'infos
+        url = "watch?v=" + json.loads(Path(options["--load-info-json"][-1]).read_text())["id"]
+    single = "watch?v=" in url
+    if single:
+        vid = url.rsplit("=", 1)[1]
+        # Position de la vidéo dans la playlist (l'inverse de video_number)
+        selected = [video_number(cfg, int(vid[2:]))] if vid.startswith("bv") else []
+    else:
+        count = cfg["entries"]
+        if "--playlist-items" in options:
+            selected = parse_items(options["--playlist-items"][-1], count)
+        else:
+            end = int(options.get("--playlist-end", [count])[-1])
+            selected = list(range(1, min(count, end) + 1))
+
+    if "--flat-playlist" in flags:
+        return list_entries(cfg, options, selected, single=single)
+    return download(cfg, options, flags, selected, rng, single=single)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,40 @@
+"""Réglages communs des faux yt-dlp / rclone (fichier JSON désigné par BENCH_CONFIG)"""
+import json
+import os
+
+DEFAULTS = {
+    "entries": 100,            # vidéos dans la playlist
+    "reverse": False,          # playlist réordonnée (la dernière vidéo en premier)
+    "duration": 600,           # durée de chaque vidéo (s)
+    "short_rate": 0.0,         # part des vidéos de 20 s seulement
+    "extract_latency": 0.0,    # extraction des infos d'une vidéo (s), évitée par --load-info-json
+    "file_size": 2_000_000,    # taille d'une vidéo complète (octets)
+    "startup": 0.05,           # lancement d'un processus (s)
+    "list_rate": 2000,         # vidéos listées par seconde (--flat-playlist)
+    "throughput": 50_000_000,  # débit de téléchargement (octets/s)
+    "fail_rate": 0.0,          # probabilité d'erreur temporaire par vidéo / par upload
+    "rate_limit_rate": 0.0,    # probabilité de 429 par vidéo / par upload
+    "permanent_rate": 0.0,     # part des vidéos toujours indisponibles
+    "fail_latency": 0.1,       # durée avant l'erreur (s)
+    "rclone_latency": 0.2,     # coût fixe d'une commande rclone (s)
+    "rclone_throughput": 20_000_000,  # débit d'upload (octets/s)
+    "list_latency": 0.5,       # coût fixe d'un listing rclone lsjson (s)
+    "remote_dir": "",          # dossier qui joue le rôle du remote
+    "calls_log": "",           # une ligne par processus lancé
+}
+
+
+def load_config():
+    cfg = dict(DEFAULTS)
+    path = os.environ.get("BENCH_CONFIG")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            cfg.update(json.load(f))
+    return cfg
+
+
+def record_call(cfg, tool, action):
+    """Compte les lancements (écriture en ajout : sûre entre processus pour une ligne courte)"""
+    if cfg["calls_log"]:
+        with open(cfg["calls_log"], "a", encoding="utf-8") as f:
+            f.write(f"{tool} {action}\n")
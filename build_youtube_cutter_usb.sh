@@ -107,19 +107,20 @@ Aucune installation requise. Usage légal uniquement.
 EOF
 
 # ------------------------
-# COPY GUI
+# COPY SOURCES
 # ------------------------
-echo "📋 Copie gui.py..."
+# gui.py importe les autres modules de src/ (engine, scheduler, journal...) : tous copiés
+echo "📋 Copie des sources..."
 mkdir -p $BASE_DIR/src
-cp $GUI_FILE $BASE_DIR/src/
+cp $SRC_DIR/*.py $BASE_DIR/src/
 
 # ------------------------
 # BUILD WINDOWS
 # ------------------------
 echo "🪟 Préparation Windows (build .exe ignoré depuis Linux)..."
 echo "⚠️  Pour builder l'exe Windows, exécute ce script depuis Windows"
-# Copie du script Python brut pour Windows
-cp $BASE_DIR/src/gui.py $BASE_DIR/windows/
+# Copie des scripts Python bruts pour Windows (gui.py et ses modules)
+cp $BASE_DIR/src/*.py $BASE_DIR/windows/
 
 # ------------------------
 # BUILD LINUX
@@ -128,6 +129,7 @@ echo "🐧 Build Linux..."
 /home/a154355/git/perso/yt/.venv/bin/python -m PyInstaller \
   --onefile \
   --add-binary "$LINUX_BIN:bin" \
+  --paths $BASE_DIR/src \
   $BASE_DIR/src/gui.py
 cp dist/gui $BASE_DIR/linux/YouTubeCutter
 chmod +x $BASE_DIR/linux/YouTubeCutter
@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+# Durée d'une fenêtre de mesure du débit (secondes)
+WINDOW = 5.0
+# Gain de débit minimum pour garder une valeur plus haute
+MIN_GAIN = 0.05
+# Fenêtres sans nouvel essai après un retour en arrière ou un ralentissement
+HOLD_WINDOWS = 3
+
+
+class Knob:
+    """Réglage entier borné (téléchargements, fragments, transferts) ajusté sur le débit mesuré.
+
+    Monte d'une unité tant que le débit progresse, revient à la meilleure valeur sinon ;
+    divisé par deux quand l'hôte limite le débit.
+    """
+
+    def __init__(self, name, value, low, high, apply, log=print):
+        self.name = name
+        self.low = max(1, low)
+        self.high = max(self.low, high)
+        self.value = min(self.high, max(self.low, value))
+        self.apply = apply  # apply(valeur) : applique le réglage au moteur
+        self.log = log
+        self.best = self.value
+        self.best_rate = 0.0
+        self.hold = 0
+        apply(self.value)
+
+    def _set(self, value, reason):
+        if value != self.value:
+            self.log(f"🎛️ {self.name}: {self.value} → {value} ({reason})")
+            self.value = value
+            self.apply(value)
+
+    def throttled(self):
+        self.best = max(self.low, self.value // 2)
+        self.best_rate = 0.0
+        self.hold = HOLD_WINDOWS
+        self._set(self.best, "débit limité")
+
+    def update(self, rate, errors=False):
+        """Une fenêtre mesurée à la valeur courante ; True si un essai est en cours"""
+        if self.value == self.best:
+            # Nouvelle mesure à la meilleure valeur (le réseau a pu changer)
+            self.best_rate = rate
+        elif rate > self.best_rate * (1 + MIN_GAIN):
+            self.best, self.best_rate = self.value, rate
+        else:
+            self.hold = HOLD_WINDOWS
+            self._set(self.best, "sans gain")
+            return False
+        if self.hold:
+            self.hold -= 1
+        elif not errors and self.value < self.high:
+            self._set(self.value + 1, "essai")
+        return self.value != self.best
+
+
+class TuneGroup:
+    """Réglages d'un même sens (téléchargement ou upload), mesurés sur le même débit"""
+
+    def __init__(self, key, received, bucket, knobs):
+        self.key = key  # "download:hôte" ou "upload:remote"
+        self.received = received  # fonction -> octets reçus/envoyés au total
+        self.bucket = bucket  # seau de l'hôte : ses pénalités signalent un ralentissement
+        self.knobs = knobs
+        self.turn = 0
+        self.last_bytes = received()
+        self.last_penalties = bucket.penalties if bucket else 0
+
+
+class AutoTuner:
+    """Ajuste pendant l'exécution les téléchargements parallèles, les fragments yt-dlp et les
+    transferts rclone sur le débit mesuré, dans les bornes du job.
+
+    Un seul réglage par sens change à la fois ; les dernières bonnes valeurs sont gardées
+    par hôte et par remote pour démarrer l'exécution suivante.
+    """
+
+    def __init__(self, state_file, errors=lambda: 0, window=WINDOW, log=print):
+        self.state_file = Path(state_file)
+        self.errors = errors  # fonction -> nouveaux essais cumulés (erreurs temporaires)
+        self.window = window
+        self.log = log
+        self.groups = []
+        self.state = self._load()
+        self._last_errors = errors()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=2)
+            tmp.replace(self.state_file)
+        except OSError as e:
+            self.log(f"⚠️ Erreur lors de la sauvegarde des réglages: {e}")
+
+    def saved(self, key, name, default):
+        """Dernière bonne valeur d'un réglage pour cet hôte / ce remote"""
+        return self.state.get(key, {}).get(name, default)
+
+    def add_group(self, key, received, bucket, knobs):
+        with self._lock:
+            self.groups.append(TuneGroup(key, received, bucket, knobs))
+        described = ", ".join(f"{k.name} {k.value} ({k.low}-{k.high})" for k in knobs)
+        self.log(f"🎛️ Réglage auto {key}: {described}")
+
+    def start(self):
+        if not self._thread:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        last = time.monotonic()
+        while not self._stop.wait(self.window):
+            now = time.monotonic()
+            self.tick(now - last)
+            last = now
+
+    def tick(self, elapsed):
+        """Fin d'une fenêtre : un réglage par groupe est ajusté sur le débit de la fenêtre"""
+        errors = self.errors()
+        new_errors = errors > self._last_errors
+        self._last_errors = errors
+        with self._lock:
+            groups = list(self.groups)
+        for group in groups:
+            total = group.received()
+            rate = (total - group.last_bytes) / elapsed if elapsed > 0 else 0.0
+            group.last_bytes = total
+            penalties = group.bucket.penalties if group.bucket else 0
+            throttled = penalties > group.last_penalties
+            group.last_penalties = penalties
+            if throttled:
+                for knob in group.knobs:
+                    knob.throttled()
+                continue
+            if rate <= 0:
+                # Rien n'a circulé (attente, fin de liste) : pas de mesure
+                continue
+            knob = group.knobs[group.turn % len(group.knobs)]
+            if not knob.update(rate, errors=new_errors):
+                group.turn += 1
+
+    def stop(self):
+        """Arrête les ajustements et garde les meilleures valeurs pour l'exécution suivante"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            for group in self.groups:
+                self.state.setdefault(group.key, {}).update({k.name: k.best for k in group.knobs})
+            if self.groups:
+                self._save()
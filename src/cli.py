@@ -0,0 +1,254 @@
+import argparse
+import json
+import signal
+import sys
+
+from content_index import MANIFEST_NAME
+from cutlist import load_cut_list, parse_segments
+from engine import QUEUE_FILE, CutterEngine, JobConfig, PAUSED, load_config, new_log_file
+from job_queue import JobQueue, QueueRunner, parse_job_file
+from metrics import prometheus_text, write_text_atomic
+from source_cache import CUT_MODES
+
+# Options de la file de jobs (ne font pas partie d'un job)
+QUEUE_OPTIONS = ("add_jobs", "run_queue", "list_jobs", "max_jobs", "download_slots", "upload_slots")
+# Options d'exécution (ne font pas partie d'un job)
+RUN_OPTIONS = ("job_json", "events", "metrics_file")
+
+# Signaux d'arrêt propre (SIGBREAK : Ctrl+Break sous Windows, envoyé par le serveur de jobs)
+STOP_SIGNALS = [getattr(signal, name) for name in ("SIGINT", "SIGTERM", "SIGBREAK") if hasattr(signal, name)]
+
+
+def build_parser():
+    defaults = JobConfig()
+    parser = argparse.ArgumentParser(
+        prog="youtube-cutter",
+        description="Découpe et télécharge des vidéos YouTube, avec upload rclone optionnel."
+    )
+    parser.add_argument("url", nargs="?", help="URL de la vidéo, playlist ou chaîne")
+    parser.add_argument("--from-config", action="store_true",
+                        help="Partir de la dernière configuration de l'interface (config.json)")
+    parser.add_argument("--job-json", metavar="JSON",
+                        help="Job complet en JSON (mêmes clés que config.json), utilisé par le serveur de jobs")
+    parser.add_argument("--events", action="store_true",
+                        help="Sortie en événements JSON, un par ligne (log, progress, stats, metrics, status)")
+    parser.add_argument("--metrics-file", metavar="FICHIER",
+                        help="Mesures de l'exécution au format texte Prometheus (collecteur textfile) ; "
+                             "le résumé JSON est toujours écrit dans jobs/metrics/")
+    parser.add_argument("--mode", choices=["video", "playlist", "channel"])
+    parser.add_argument("--start", type=int, help=f"Début en secondes (défaut {defaults.start})")
+    parser.add_argument("--cut", action="append", dest="cuts", metavar="DÉBUT-FIN [NOM]",
+                        help="Plage à découper, répétable (ex: \"1:00-1:30 Intro\")")
+    parser.add_argument("--cut-list", metavar="FICHIER",
+                        help="Plages à découper depuis un fichier CSV (début,fin,nom), JSON ou texte")
+    parser.add_argument("--end", type=int, help=f"Fin en secondes (défaut {defaults.end})")
+    parser.add_argument("--res", type=int, help=f"Résolution max (défaut {defaults.res})")
+    parser.add_argument("--audio-only", action="store_true", default=None, help="Audio seulement (MP3)")
+    parser.add_argument("-o", "--output", help="Dossier de sortie")
+    parser.add_argument("--max-videos", type=int, help="Nombre max de vidéos (0 = toutes)")
+    parser.add_argument("--download-workers", type=int, help="Téléchargements parallèles")
+    parser.add_argument("--postprocess-workers", type=int,
+                        help="Conversions ffmpeg (MP3, remux) en parallèle (défaut 0 = une par cœur)")
+    parser.add_argument("--autotune", action="store_true", default=None,
+                        help="Téléchargements, fragments et transferts rclone ajustés sur le débit mesuré "
+                             "(dernières bonnes valeurs reprises au lancement suivant)")
+    parser.add_argument("--max-download-workers", type=int,
+                        help=f"Autotune : téléchargements parallèles max (défaut {defaults.max_download_workers})")
+    parser.add_argument("--max-upload-workers", type=int,
+                        help=f"Autotune : uploads parallèles max (défaut {defaults.max_upload_workers})")
+    parser.add_argument("--max-fragments", type=int,
+                        help=f"Autotune : fragments yt-dlp parallèles max, cache source (défaut {defaults.max_fragments})")
+    parser.add_argument("--remote", dest="rclone_remote", help="Remote rclone (active l'upload)")
+    parser.add_argument("--folder", dest="gdrive_folder", help="Chemin sur le remote (ex: JDR/AnimatedBattleMaps)")
+    parser.add_argument("--delete-local", action="store_true", default=None, help="Supprimer local après upload")
+    parser.add_argument("--skip-check", action="store_true", default=None, help="Skip vérification Drive")
+    parser.add_argument("--manifest", dest="remote_manifest", action="store_true", default=None,
+                        help=f"Identités des fichiers aussi dans un manifeste sur le remote ({MANIFEST_NAME})")
+    parser.add_argument("--no-rename", dest="remote_rename", action="store_false", default=None,
+                        help="Fichier déjà uploadé sous un autre nom : le garder tel quel (pas de rclone moveto)")
+    parser.add_argument("--upload-workers", type=int, help="Uploads parallèles")
+    parser.add_argument("--bulk", dest="upload_bulk", action="store_true", default=None,
+                        help="Upload groupé (--files-from)")
+    parser.add_argument("--pipeline", action="store_true", default=None, help="Upload en continu")
+    parser.add_argument("--rcd", dest="rclone_rcd", action="store_true", default=None,
+                        help="Une session rclone rcd pour toutes les opérations (listings, copies, renommages) "
+                             "au lieu d'un processus rclone par opération")
+    parser.add_argument("--retries", type=int,
+                        help="Nouveaux essais d'une vidéo ou d'un upload en échec temporaire (défaut 3)")
+    parser.add_argument("--staging-gb", type=float,
+                        help="Espace local max des fichiers pas encore uploadés, en Go (avec --delete-local)")
+    parser.add_argument("--staging-files", type=int,
+                        help="Nombre max de fichiers locaux pas encore uploadés (avec --delete-local)")
+    parser.add_argument("--source-cache", action="store_true", default=None,
+                        help="Garder la vidéo complète en cache et découper en local (ffmpeg)")
+    parser.add_argument("--source-cache-gb", type=int, help="Taille max du cache source en Go")
+    parser.add_argument("--cut-mode", choices=CUT_MODES,
+                        help="Découpe locale : fast (copie des flux) ou accurate (ré-encodage, à l'image près)")
+
+    queue = parser.add_argument_group("file de jobs")
+    queue.add_argument("--add-jobs", metavar="FICHIER",
+                       help="Ajouter à la file les URL d'un fichier texte ou CSV (options par ligne : "
+                            "mode=channel end=30 folder=JDR/AnimatedBattleMaps ...)")
+    queue.add_argument("--run-queue", action="store_true", help="Exécuter les jobs en attente de la file")
+    queue.add_argument("--list-jobs", action="store_true", help="Afficher la file de jobs")
+    queue.add_argument("--max-jobs", type=int, default=2, help="Jobs simultanés (défaut 2)")
+    queue.add_argument("--download-slots", type=int, default=3,
+                       help="Téléchargements simultanés, tous jobs confondus (défaut 3)")
+    queue.add_argument("--upload-slots", type=int, default=4,
+                       help="Uploads simultanés, tous jobs confondus (défaut 4)")
+    return parser
+
+
+def overrides_from_args(args):
+    """Options du job données explicitement : config.json éventuelle, puis ligne de commande"""
+    data = load_config() if args.from_config else {}
+    if args.job_json:
+        data.update(json.loads(args.job_json))
+    overrides = {k: v for k, v in vars(args).items()
+                 if v is not None and k not in ("from_config", "cuts", "cut_list") + QUEUE_OPTIONS + RUN_OPTIONS}
+    segments = []
+    if args.cut_list:
+        segments += load_cut_list(args.cut_list)
+    for cut in args.cuts or []:
+        segments += parse_segments(cut)
+    if segments:
+        overrides["segments"] = [list(s) for s in segments]
+    elif "start" in overrides or "end" in overrides:
+        # --start/--end remplacent les plages éventuelles de config.json
+        overrides["segments"] = []
+    if overrides.get("rclone_remote"):
+        overrides["gdrive_enabled"] = True
+    data.update(overrides)
+    return data
+
+
+def job_from_args(args):
+    return JobConfig.from_dict(overrides_from_args(args))
+
+
+def print_jobs(queue):
+    for item in queue.list():
+        job = item["job"]
+        folder = f" -> {job['gdrive_folder']}" if job.get("gdrive_folder") else ""
+        error = f" ({item['error']})" if item["error"] else ""
+        print(f"{item['id']}  {item['status']:<8} {job.get('mode', '?'):<8} {job['url']}{folder}{error}")
+
+
+def queue_main(args):
+    """--add-jobs / --list-jobs / --run-queue"""
+    queue = JobQueue(QUEUE_FILE)
+    if args.add_jobs:
+        # Les options de la ligne de commande servent de valeurs par défaut pour chaque ligne
+        defaults = overrides_from_args(args)
+        if args.mode is None:
+            # Mode déduit de chaque URL (playlist, chaîne ou vidéo)
+            defaults.pop("mode", None)
+        jobs = parse_job_file(args.add_jobs, defaults)
+        for job in jobs:
+            queue.add(job)
+        print(f"📥 {len(jobs)} job(s) ajouté(s) à la file")
+
+    if args.list_jobs:
+        print_jobs(queue)
+
+    if not args.run_queue:
+        return 0
+
+    main_engine = CutterEngine(on_log=print, log_file=new_log_file())
+    engines = []
+
+    def make_engine(item, download_slots, upload_slots):
+        engine = CutterEngine(
+            on_log=print,
+            log_writer=main_engine.log_writer,
+            log_prefix=f"[{item['id']}] ",
+            download_slots=download_slots,
+            upload_slots=upload_slots
+        )
+        engines.append(engine)
+        return engine
+
+    runner = QueueRunner(
+        queue,
+        make_engine,
+        max_jobs=args.max_jobs,
+        download_slots=args.download_slots,
+        upload_slots=args.upload_slots,
+        log=main_engine.log
+    )
+
+    def request_stop(signum, frame):
+        print("⏸️ Arrêt demandé...", file=sys.stderr)
+        runner.stop()
+
+    for sig in STOP_SIGNALS:
+        signal.signal(sig, request_stop)
+
+    try:
+        counts = runner.run()
+    finally:
+        main_engine.close()
+    if args.metrics_file:
+        # Un jeu de séries par job exécuté
+        write_text_atomic(args.metrics_file, prometheus_text([e.metrics.summary() for e in engines if e.metrics]))
+    print(", ".join(f"{n} {status}" for status, n in counts.items()))
+    if runner.stopped:
+        return 130
+    return 1 if counts.get("failed") else 0
+
+
+def emit_event(kind, **data):
+    """Événement JSON sur une ligne de la sortie standard (--events)"""
+    print(json.dumps({"type": kind, **data}, ensure_ascii=False), flush=True)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.add_jobs or args.run_queue or args.list_jobs:
+            return queue_main(args)
+        job = job_from_args(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not job.url:
+        print("❌ URL manquante", file=sys.stderr)
+        return 2
+
+    if args.events:
+        engine = CutterEngine(
+            on_log=lambda msg: emit_event("log", message=msg),
+            on_progress=lambda value: emit_event("progress", percent=round(value, 1)),
+            on_stats=lambda stats: emit_event("stats", **stats),
+            log_file=new_log_file(),
+            metrics_file=args.metrics_file
+        )
+    else:
+        engine = CutterEngine(on_log=print, log_file=new_log_file(), metrics_file=args.metrics_file)
+
+    # Ctrl+C / SIGTERM / Ctrl+Break : arrêt propre, le journal permet de reprendre plus tard
+    def request_stop(signum, frame):
+        print("⏸️ Arrêt demandé...", file=sys.stderr)
+        engine.pause()
+
+    for sig in STOP_SIGNALS:
+        signal.signal(sig, request_stop)
+
+    try:
+        status = engine.run(job)
+    except Exception as e:
+        if args.events:
+            emit_event("error", message=str(e))
+        print(f"❌ Erreur: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.close()
+        if args.events and engine.metrics:
+            emit_event("metrics", **engine.metrics.summary())
+    if args.events:
+        emit_event("status", status=status)
+    return 130 if status == PAUSED else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
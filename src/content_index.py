@@ -0,0 +1,156 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+from rclone_backend import get_backend
+
+# Manifeste déposé dans le dossier distant : identités des fichiers, partagées entre machines
+MANIFEST_NAME = ".ytcutter-manifest.json"
+
+
+def content_key(video_id, segment, format_selector):
+    """Identité d'un fichier produit : vidéo, plage découpée et format (indépendante du nom)"""
+    return f"{video_id}|{segment.start:g}-{segment.end:g}|{format_selector}"
+
+
+class ContentIndex:
+    """Identité des fichiers déjà uploadés dans un dossier rclone -> nom sur le remote.
+
+    Un changement de titre ou d'ordre dans la playlist change le nom du fichier, pas son
+    identité : le fichier existant est reconnu (et renommé sur le remote) au lieu d'être
+    retéléchargé. Conservé dans le cache local et, en option, dans un manifeste sur le remote.
+    """
+
+    def __init__(self, remote, remote_path, cache_dir=None, log=print):
+        self.remote = remote
+        self.remote_path = remote_path.strip("/")
+        self.log = log
+        self.items = {}  # identité -> {"name": str, "size": int}
+        self.manifest_loaded = False
+        self._dirty = False  # changements pas encore écrits dans le manifeste distant
+        self._lock = threading.Lock()
+
+        self.cache_file = None
+        if cache_dir:
+            key = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+            self.cache_file = Path(cache_dir) / f"identity_{key}.json"
+        self._load_cache()
+
+    @property
+    def root(self):
+        return f"{self.remote}:{self.remote_path}" if self.remote_path else f"{self.remote}:"
+
+    @property
+    def manifest(self):
+        return f"{self.root}/{MANIFEST_NAME}" if self.remote_path else f"{self.root}{MANIFEST_NAME}"
+
+    def _load_cache(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.items = json.load(f).get("items", {})
+        except Exception as e:
+            self.log(f"⚠️ Index des identités illisible: {e}")
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"root": self.root, "items": self.items}, f)
+            tmp.replace(self.cache_file)
+        except Exception as e:
+            self.log(f"⚠️ Erreur lors de la sauvegarde des identités: {e}")
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def lookup(self, key):
+        """Nom sur le remote du fichier de cette identité, ou None"""
+        entry = self.items.get(key)
+        return entry["name"] if entry else None
+
+    def record(self, key, name, size=-1):
+        with self._lock:
+            if self.items.get(key) == {"name": name, "size": size}:
+                return
+            self.items[key] = {"name": name, "size": size}
+            self._dirty = True
+            self._save_cache()
+
+    def forget(self, key):
+        with self._lock:
+            if self.items.pop(key, None) is not None:
+                self._dirty = True
+                self._save_cache()
+
+    # --- Manifeste distant ---
+    def load_manifest(self):
+        """Fusionne le manifeste du remote (une fois par session) ; les entrées locales priment"""
+        if self.manifest_loaded:
+            return True
+        try:
+            result = get_backend().cat(self.manifest)
+        except Exception as e:
+            self.log(f"⚠️ Lecture du manifeste impossible: {e}")
+            return False
+        self.manifest_loaded = True
+        if result.returncode != 0:
+            # Pas encore de manifeste dans ce dossier
+            if "not found" not in result.stderr:
+                self.log(f"⚠️ Lecture du manifeste en échec (code {result.returncode})")
+            return False
+        try:
+            remote_items = json.loads(result.stdout or "{}").get("items", {})
+        except ValueError:
+            self.log("⚠️ Manifeste distant invalide, ignoré")
+            return False
+        with self._lock:
+            added = {k: v for k, v in remote_items.items() if k not in self.items}
+            self.items.update(added)
+            # Entrées locales absentes ou différentes du manifeste : à réécrire
+            self._dirty = any(remote_items.get(k) != v for k, v in self.items.items())
+            if added:
+                self._save_cache()
+        self.log(f"   🧾 Manifeste Drive: {len(remote_items)} identité(s), {len(added)} nouvelle(s)")
+        return True
+
+    def save_manifest(self):
+        """Écrit le manifeste sur le remote (rclone rcat) s'il a changé"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = json.dumps({"updated_at": time.time(), "items": self.items}, ensure_ascii=False)
+            self._dirty = False
+        try:
+            result = get_backend().rcat(self.manifest, data)
+            ok = result.returncode == 0
+            if not ok:
+                self.log(f"⚠️ Écriture du manifeste en échec (code {result.returncode})")
+        except Exception as e:
+            ok = False
+            self.log(f"⚠️ Écriture du manifeste impossible: {e}")
+        if not ok:
+            self._dirty = True
+            return False
+        self.log(f"🧾 Manifeste Drive mis à jour ({len(self.items)} identité(s))")
+        return True
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_content_index(remote, remote_path, **kwargs):
+    """Retourne l'index des identités partagé pour un remote:chemin donné"""
+    key = (remote, remote_path.strip("/"))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = ContentIndex(remote, remote_path, **kwargs)
+        return _indexes[key]
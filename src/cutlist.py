@@ -0,0 +1,145 @@
+import csv
+import json
+import re
+from collections import namedtuple
+from pathlib import Path
+
+# Une plage à découper, en secondes ; le nom (optionnel) sert au nom du fichier produit
+Segment = namedtuple("Segment", "start end name", defaults=("",))
+
+# Ajouté par yt-dlp au nom de chaque fichier quand plusieurs plages sont découpées,
+# puis remplacé par le nom de la plage (voir split_section_name)
+SECTION_TEMPLATE = " @%(section_start)s"
+
+_LINE_RE = re.compile(r"^\s*([\d:.]+)\s*-\s*([\d:.]+)(?:\s+(.*?))?\s*$")
+_UNSAFE_RE = re.compile(r'[\\/:*?"<>|]+')
+
+
+def parse_timestamp(value):
+    """Secondes à partir de "90", "1:30", "01:02:03" ou "1:30.5" """
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    try:
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Horodatage invalide: {text!r}")
+    if text.count(":") > 2 or seconds < 0:
+        raise ValueError(f"Horodatage invalide: {text!r}")
+    return int(seconds) if seconds.is_integer() else seconds
+
+
+def format_seconds(seconds):
+    """"90" ou "90.5" (sans ":" pour rester valide dans un nom de fichier)"""
+    return str(int(seconds)) if float(seconds).is_integer() else f"{seconds:g}"
+
+
+def format_timestamp(seconds):
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    secs = format_seconds(secs).zfill(2)
+    return f"{hours}:{minutes:02d}:{secs}" if hours else f"{minutes}:{secs}"
+
+
+def make_segment(start, end, name=""):
+    segment = Segment(parse_timestamp(start), parse_timestamp(end), (name or "").strip())
+    if segment.end <= segment.start:
+        raise ValueError(f"Plage invalide: {start}-{end}")
+    return segment
+
+
+def parse_segments(text):
+    """Plages "début-fin [nom]" séparées par des retours à la ligne ou des ";" """
+    segments = []
+    for line in re.split(r"[;\n]", text or ""):
+        if not line.strip() or line.strip().startswith("#"):
+            continue
+        match = _LINE_RE.match(line)
+        if not match:
+            raise ValueError(f"Plage invalide: {line.strip()!r} (attendu: début-fin [nom])")
+        segments.append(make_segment(*match.groups()))
+    return segments
+
+
+def format_segments(segments):
+    """Inverse de parse_segments (une seule ligne, pour l'interface)"""
+    return "; ".join(
+        f"{format_timestamp(s.start)}-{format_timestamp(s.end)}" + (f" {s.name}" if s.name else "")
+        for s in segments
+    )
+
+
+def load_cut_list(path):
+    """Charge une liste de plages depuis un fichier CSV (début,fin[,nom]), JSON ou texte"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+
+    if path.suffix.lower() == ".json":
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get("segments", [])
+        segments = []
+        for item in data:
+            if isinstance(item, dict):
+                segments.append(make_segment(item["start"], item["end"], item.get("name", "")))
+            else:
+                segments.append(make_segment(*item[:3]))
+        return segments
+
+    if path.suffix.lower() == ".csv":
+        segments = []
+        for i, row in enumerate(csv.reader(content.splitlines())):
+            if not row or not row[0].strip() or row[0].strip().startswith("#"):
+                continue
+            try:
+                segments.append(make_segment(*[c.strip() for c in row[:3]]))
+            except (TypeError, ValueError):
+                if i == 0:
+                    continue  # Ligne d'en-tête
+                raise ValueError(f"Ligne {i + 1} invalide: {','.join(row)}")
+        return segments
+
+    return parse_segments(content)
+
+
+def sections_arg(segments):
+    """Valeur de --download-sections : toutes les plages en un seul passage yt-dlp"""
+    return "*" + ",".join(f"{format_seconds(s.start)}-{format_seconds(s.end)}" for s in segments)
+
+
+def segment_label(segment):
+    if segment.name:
+        return _UNSAFE_RE.sub("_", segment.name)
+    return f"{format_seconds(segment.start)}-{format_seconds(segment.end)}"
+
+
+def segment_filename(filename, segment):
+    """"001 - Titre.mp4" -> "001 - Titre - Intro.mp4" """
+    path = Path(filename)
+    return f"{path.stem} - {segment_label(segment)}{path.suffix}"
+
+
+def split_section_name(filename):
+    """Nom produit avec SECTION_TEMPLATE -> (nom sans la plage, début de la plage ou None)"""
+    path = Path(filename)
+    stem, sep, start = path.stem.rpartition(" @")
+    if not sep:
+        return path.name, None
+    try:
+        return f"{stem}{path.suffix}", float(start)
+    except ValueError:
+        return path.name, None
+
+
+def find_segment(segments, start):
+    """Plage qui commence à `start` (à une demi-seconde près)"""
+    if start is None:
+        return None
+    return min(
+        (s for s in segments if abs(s.start - start) < 0.5),
+        key=lambda s: abs(s.start - start),
+        default=None
+    )
@@ -0,0 +1,476 @@
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import fields
+from pathlib import Path
+from urllib.parse import urlparse
+
+from engine import BASE_DIR, JOBS_DIR, JobConfig, probe_rclone_remotes
+from job_queue import CANCELLED, DONE, FAILED, PAUSED, PENDING, RUNNING, JobQueue
+from metrics import PROMETHEUS_PREFIX, prometheus_text
+
+# File des jobs soumis au serveur (séparée de celle de la ligne de commande)
+SERVER_QUEUE_FILE = JOBS_DIR / "server_queue.json"
+
+# Chaque job est exécuté par la ligne de commande, en sous-processus asyncio
+CLI = Path(__file__).with_name("cli.py")
+
+# Événements gardés par job (rejoués aux nouveaux abonnés SSE)
+EVENT_HISTORY = 500
+# Commentaire SSE envoyé régulièrement pour garder la connexion ouverte (s)
+HEARTBEAT = 15
+
+# Windows : chaque job dans son groupe de processus, pour recevoir Ctrl+Break (arrêt propre)
+WINDOWS = sys.platform.startswith("win")
+CREATION_FLAGS = subprocess.CREATE_NEW_PROCESS_GROUP if WINDOWS else 0
+
+# Taille maximale du corps d'une requête (un job JSON)
+MAX_BODY = 1024 * 1024
+# Nom de remote rclone (sans les ":"), jamais un chemin local ni une option
+REMOTE_RE = re.compile(r"^\w[\w.\- ]*$")
+
+# Jeton d'accès à l'API (obligatoire hors 127.0.0.1), à défaut de --token
+TOKEN_ENV = "YTCUTTER_SERVER_TOKEN"
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def check_types(data):
+    """Refuse les valeurs dont le type ne correspond pas au champ du job (ex: "abc" pour un nombre)"""
+    accepted = {int: (int,), float: (int, float), bool: (bool,), str: (str,), list: (list,)}
+    for f in fields(JobConfig):
+        if f.name not in data or f.type not in accepted:
+            continue
+        value = data[f.name]
+        # bool est un int pour Python : refusé pour les champs numériques
+        if not isinstance(value, accepted[f.type]) or (f.type is not bool and isinstance(value, bool)):
+            raise HttpError(400, f"{f.name}: {f.type.__name__} attendu")
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class JobServer:
+    """Serveur de jobs : file persistante, API HTTP/JSON et événements SSE.
+
+    Un seul thread (boucle asyncio) : chaque job est un sous-processus "cli.py --events"
+    dont la sortie JSON est relayée aux clients abonnés. Les fichiers des jobs restent sous
+    output_root ; avec un jeton, chaque requête doit porter "Authorization: Bearer <jeton>".
+    """
+
+    def __init__(self, queue, max_jobs=2, output_root=BASE_DIR, token="", remotes=None, log=print):
+        self.queue = queue
+        self.max_jobs = max(1, max_jobs)
+        self.output_root = Path(output_root).resolve()
+        self.token = token
+        # Remotes rclone configurés (relevés au démarrage) ; None si rclone n'a pas répondu
+        self.remotes = remotes
+        self.log = log
+        self.processes = {}  # job -> processus (None pendant le démarrage)
+        self.cancelled = set()
+        self.pausing = set()  # pauses demandées, appliquées dès que le processus existe
+        self.history = {}  # job -> derniers événements
+        self.progress = {}  # job -> dernière progression / statistiques
+        self.metrics = {}  # job -> mesures de la dernière exécution (GET /metrics)
+        self.subscribers = set()  # (job ou None pour tous, asyncio.Queue)
+        self.stopping = False
+        self._wakeup = None
+        self._stopped = None
+        self._server = None
+
+    # --- Événements ---
+    def publish(self, job_id, event):
+        event = {"job": job_id, "time": time.time(), **event}
+        if event.get("type") in ("progress", "stats"):
+            self.progress.setdefault(job_id, {}).update({k: v for k, v in event.items() if k not in ("job", "type")})
+        elif event.get("type") == "metrics":
+            self.metrics[job_id] = {k: v for k, v in event.items() if k not in ("job", "type", "time")}
+            self.metrics[job_id]["job_id"] = job_id
+        self.history.setdefault(job_id, deque(maxlen=EVENT_HISTORY)).append(event)
+        for wanted, events in list(self.subscribers):
+            if wanted in (None, job_id):
+                if events.full():
+                    # Client trop lent : on perd les plus anciens événements plutôt que de bloquer
+                    events.get_nowait()
+                events.put_nowait(event)
+
+    def set_status(self, job_id, status, error=""):
+        self.queue.set_status(job_id, status, error=error)
+        self.publish(job_id, {"type": "status", "status": status, "error": error})
+
+    # --- Exécution des jobs ---
+    async def dispatch(self):
+        """Lance les jobs en attente dans la limite de max_jobs"""
+        while not self.stopping:
+            while len(self.processes) < self.max_jobs:
+                item = self.queue.claim()
+                if not item:
+                    break
+                self.processes[item["id"]] = None
+                asyncio.create_task(self.run_job(item))
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def run_job(self, item):
+        job_id = item["id"]
+        self.publish(job_id, {"type": "status", "status": RUNNING})
+        self.log(f"▶ Job {job_id}: {item['job'].get('url', '')}")
+        error = ""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, str(CLI), "--events", "--job-json", json.dumps(item["job"]),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1"),
+                limit=1024 * 1024,
+                creationflags=CREATION_FLAGS
+            )
+        except OSError as e:
+            self.processes.pop(job_id, None)
+            self.set_status(job_id, FAILED, error=str(e))
+            self._wakeup.set()
+            return
+
+        self.processes[job_id] = process
+        # Pause, annulation ou arrêt du serveur demandés pendant le démarrage
+        if job_id in self.pausing or job_id in self.cancelled or self.stopping:
+            self._interrupt(job_id)
+        async for raw in process.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            event = None
+            if line.startswith("{"):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    pass
+            if not isinstance(event, dict):
+                event = {"type": "log", "message": line}
+            if event.get("type") == "error":
+                error = event.get("message", "")
+            self.publish(job_id, event)
+        code = await process.wait()
+        self.processes.pop(job_id, None)
+        pausing = job_id in self.pausing
+        self.pausing.discard(job_id)
+
+        if job_id in self.cancelled:
+            self.cancelled.discard(job_id)
+            status = CANCELLED
+        elif code == 130 or (code != 0 and (pausing or self.stopping)):
+            # Arrêt demandé (y compris interrompu avant d'avoir pu s'arrêter proprement) :
+            # le journal permet de reprendre ; arrêt du serveur : le job repartira au prochain démarrage
+            status = PENDING if self.stopping else PAUSED
+        elif code == 0:
+            status = DONE
+        else:
+            status = FAILED
+            error = error or f"code {code}"
+        self.set_status(job_id, status, error=error)
+        self.log(f"■ Job {job_id}: {status}")
+        self._wakeup.set()
+
+    def _interrupt(self, job_id):
+        """Arrêt propre du job (Ctrl+C, Ctrl+Break sous Windows) : le journal permet de reprendre
+        ensuite. False si le processus n'est pas encore lancé (run_job l'arrêtera au lancement)"""
+        process = self.processes.get(job_id)
+        if process is None or process.returncode is not None:
+            return False
+        process.send_signal(signal.CTRL_BREAK_EVENT if WINDOWS else signal.SIGINT)
+        return True
+
+    # --- Actions ---
+    def submit(self, data):
+        if not isinstance(data, dict) or not str(data.get("url", "")).strip():
+            raise HttpError(400, "URL manquante")
+        url = urlparse(str(data["url"]).strip())
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise HttpError(400, "URL invalide (http ou https uniquement)")
+        check_types(data)
+        remote = data.get("rclone_remote", "")
+        if remote and (not REMOTE_RE.match(remote) or (self.remotes is not None and remote not in self.remotes)):
+            raise HttpError(400, f"Remote rclone inconnu: {remote}")
+        if data.get("gdrive_folder", "").startswith("-"):
+            raise HttpError(400, "gdrive_folder invalide")
+        data = dict(data, url=url.geturl(), output=self.output_dir(data.get("output")))
+        try:
+            job = JobConfig.from_dict(data)
+            job.cut_segments()
+        except (TypeError, ValueError) as e:
+            raise HttpError(400, str(e))
+        job_id = self.queue.add({k: v for k, v in data.items() if k in job.to_dict()})
+        self.publish(job_id, {"type": "status", "status": PENDING})
+        self._wakeup.set()
+        return self.job_info(job_id)
+
+    def output_dir(self, output):
+        """Dossier de sortie d'un job (relatif à output_root), refusé s'il en sort"""
+        path = (self.output_root / str(output or "")).resolve()
+        if path != self.output_root and self.output_root not in path.parents:
+            raise HttpError(400, f"Dossier de sortie hors de {self.output_root}")
+        return str(path)
+
+    def pause(self, job_id):
+        item = self._get(job_id)
+        if item["status"] == RUNNING:
+            self.pausing.add(job_id)
+            self._interrupt(job_id)
+        elif item["status"] == PENDING:
+            self.set_status(job_id, PAUSED)
+        else:
+            raise HttpError(409, f"Job {item['status']}")
+        return self.job_info(job_id)
+
+    def resume(self, job_id):
+        item = self._get(job_id)
+        if item["status"] not in (PAUSED, FAILED, CANCELLED):
+            raise HttpError(409, f"Job {item['status']}")
+        self.set_status(job_id, PENDING)
+        self._wakeup.set()
+        return self.job_info(job_id)
+
+    def cancel(self, job_id):
+        item = self._get(job_id)
+        if item["status"] == RUNNING:
+            self.cancelled.add(job_id)
+            self._interrupt(job_id)
+        elif item["status"] in (PENDING, PAUSED):
+            self.set_status(job_id, CANCELLED)
+        else:
+            raise HttpError(409, f"Job {item['status']}")
+        return self.job_info(job_id)
+
+    def delete(self, job_id):
+        item = self._get(job_id)
+        if item["status"] == RUNNING:
+            raise HttpError(409, "Job en cours, l'annuler d'abord")
+        self.queue.remove(job_id)
+        self.history.pop(job_id, None)
+        self.progress.pop(job_id, None)
+        self.metrics.pop(job_id, None)
+        return {"id": job_id, "deleted": True}
+
+    def _get(self, job_id):
+        item = self.queue.get(job_id)
+        if not item:
+            raise HttpError(404, f"Job inconnu: {job_id}")
+        return item
+
+    def job_info(self, job_id):
+        item = self._get(job_id)
+        item["progress"] = self.progress.get(job_id, {})
+        return item
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            if self.token and not hmac.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}"):
+                raise HttpError(401, "Jeton d'accès manquant ou invalide")
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY:
+                raise HttpError(413, f"Requête trop grande (max {MAX_BODY} octets)")
+            body = await reader.readexactly(length)
+            await self.route(method.upper(), urlparse(target).path.rstrip("/") or "/", body, writer)
+        except HttpError as e:
+            await self.send_json(writer, {"error": str(e)}, status=e.status)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self.send_json(writer, {"error": f"Requête invalide: {e}"}, status=400)
+        except ConnectionError:
+            pass
+        except Exception as e:
+            self.log(f"❌ Erreur serveur: {e}")
+            await self.send_json(writer, {"error": str(e)}, status=500)
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body, writer):
+        parts = path.strip("/").split("/")
+        if parts == ["jobs"]:
+            if method == "GET":
+                return await self.send_json(writer, [self.job_info(item["id"]) for item in self.queue.list()])
+            if method == "POST":
+                try:
+                    data = json.loads(body or b"{}")
+                except ValueError as e:
+                    raise HttpError(400, f"JSON invalide: {e}")
+                return await self.send_json(writer, self.submit(data), status=201)
+        elif parts == ["events"] and method == "GET":
+            return await self.stream_events(writer, None)
+        elif parts == ["metrics"] and method == "GET":
+            return await self.send_text(writer, self.metrics_text())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            if method == "GET":
+                return await self.send_json(writer, self.job_info(parts[1]))
+            if method == "DELETE":
+                return await self.send_json(writer, self.delete(parts[1]))
+        elif len(parts) == 3 and parts[0] == "jobs":
+            job_id, action = parts[1], parts[2]
+            if action == "events" and method == "GET":
+                self._get(job_id)
+                return await self.stream_events(writer, job_id)
+            actions = {"pause": self.pause, "resume": self.resume, "cancel": self.cancel}
+            if action in actions and method == "POST":
+                return await self.send_json(writer, actions[action](job_id))
+        else:
+            raise HttpError(404, f"Route inconnue: {path}")
+        raise HttpError(405, f"{method} non supporté sur {path}")
+
+    async def send_json(self, writer, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    def metrics_text(self):
+        """Format texte Prometheus : jobs par état, puis mesures de la dernière exécution de chaque job"""
+        counts = self.queue.counts()
+        lines = [f"# TYPE {PROMETHEUS_PREFIX}_server_jobs gauge"]
+        lines += [f'{PROMETHEUS_PREFIX}_server_jobs{{status="{status}"}} {counts.get(status, 0)}'
+                  for status in (PENDING, RUNNING, PAUSED, DONE, FAILED, CANCELLED)]
+        return "\n".join(lines) + "\n" + prometheus_text(list(self.metrics.values()))
+
+    async def send_text(self, writer, text, status=200):
+        body = text.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def stream_events(self, writer, job_id):
+        """Flux SSE des événements d'un job (historique puis direct), ou de tous les jobs"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        events = asyncio.Queue(maxsize=1000)
+        backlog = list(self.history.get(job_id, ())) if job_id else []
+        subscriber = (job_id, events)
+        self.subscribers.add(subscriber)
+        try:
+            for event in backlog:
+                writer.write(self._sse(event))
+            await writer.drain()
+            while not self.stopping:
+                try:
+                    event = await asyncio.wait_for(events.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                else:
+                    writer.write(self._sse(event))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+
+    @staticmethod
+    def _sse(event):
+        data = json.dumps(event, ensure_ascii=False)
+        return f"event: {event.get('type', 'message')}\ndata: {data}\n\n".encode("utf-8")
+
+    # --- Démarrage / arrêt ---
+    async def serve(self, host, port):
+        """Sert l'API jusqu'à stop() ; les jobs en cours sont arrêtés proprement"""
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self.log(f"🌐 Serveur de jobs sur http://{host}:{port} ({self.max_jobs} job(s) simultané(s))")
+        dispatcher = asyncio.create_task(self.dispatch())
+        try:
+            await self._stopped.wait()
+        finally:
+            self.stopping = True
+            self._wakeup.set()
+            self._server.close()
+            # Les jobs encore en démarrage sont arrêtés par run_job dès leur lancement
+            running = [job_id for job_id, process in self.processes.items() if process]
+            if self.processes:
+                self.log(f"⏸️ Arrêt de {len(self.processes)} job(s) en cours...")
+            for job_id in running:
+                self._interrupt(job_id)
+            while self.processes:
+                await asyncio.sleep(0.1)
+            await dispatcher
+
+    def stop(self):
+        self._stopped.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="youtube-cutter-server",
+        description="Serveur de jobs : API HTTP/JSON pour soumettre et suivre des découpes."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (défaut 8765)")
+    parser.add_argument("--max-jobs", type=int, default=2, help="Jobs simultanés (défaut 2)")
+    parser.add_argument("--output-root", default=str(BASE_DIR),
+                        help="Dossier racine des fichiers produits par les jobs (défaut : dossier du programme)")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV, ""),
+                        help=f"Jeton d'accès à l'API (ou variable {TOKEN_ENV}), obligatoire hors 127.0.0.1")
+    args = parser.parse_args(argv)
+    if not args.token and not is_loopback(args.host):
+        parser.error(f"--token (ou {TOKEN_ENV}) est obligatoire pour écouter sur {args.host}")
+
+    server = JobServer(JobQueue(SERVER_QUEUE_FILE), max_jobs=args.max_jobs,
+                       output_root=args.output_root, token=args.token, remotes=probe_rclone_remotes())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, server.stop)
+            except (NotImplementedError, AttributeError):
+                pass  # Windows : Ctrl+C lève KeyboardInterrupt
+        await server.serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
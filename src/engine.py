@@ -0,0 +1,1178 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from cutlist import (
+    SECTION_TEMPLATE,
+    find_segment,
+    make_segment,
+    sections_arg,
+    segment_filename,
+    split_section_name,
+)
+from autotune import AutoTuner, Knob
+from content_index import content_key, get_content_index
+from enumerator import enumerate_videos
+from journal import JobJournal, job_id
+from logsink import LogWriter
+from metadata_cache import InfoReuse, get_metadata_cache, too_short
+from metrics import Metrics
+from postprocess import PostProcessor
+from rclone_backend import count_call, get_backend, start_session
+from remote_index import get_remote_index
+from retry import LABELS, PERMANENT, RATE_LIMITED, backoff_delay, classify_failure, error_excerpt, host_bucket, wait
+from progress import PROGRESS_ARGS, ProgressTracker, format_bytes, format_eta, parse_progress_event
+from scheduler import DownloadScheduler, video_url
+from source_cache import CUT_FAST, SourceCache, cut_local
+from staging import SIZE_ARGS, SIZE_MARKER, StagingBudget, parse_size_line
+from uploader import Uploader, UploadPipeline
+
+# Vérifier si rclone est disponible
+RCLONE_AVAILABLE = shutil.which("rclone") is not None
+
+# --- Paths ---
+BASE_DIR = Path(__file__).parent.parent
+BIN_DIR = BASE_DIR / "bin"
+# Données (config, caches, journaux, logs) : à côté du programme, sauf si YTCUTTER_DATA_DIR est défini
+DATA_DIR = Path(os.environ.get("YTCUTTER_DATA_DIR") or BASE_DIR)
+CONFIG_FILE = DATA_DIR / "config.json"
+CACHE_DIR = DATA_DIR / "cache"
+JOBS_DIR = DATA_DIR / "jobs"
+QUEUE_FILE = JOBS_DIR / "queue.json"
+
+# Durée de validité du listing Drive mis en cache sur disque
+REMOTE_INDEX_TTL = 3600
+
+# Remotes rclone et versions des outils, affichés au démarrage avant d'être revérifiés
+TOOLS_CACHE_FILE = CACHE_DIR / "tools.json"
+# Délai max d'une vérification d'outil (config rclone lente ou sur un montage réseau)
+PROBE_TIMEOUT = 15
+# Dernières bonnes valeurs de l'autotune, par hôte et par remote
+AUTOTUNE_FILE = CACHE_DIR / "autotune.json"
+# Infos yt-dlp par vidéo (formats, durée...) partagées entre exécutions, et leurs fichiers de passage
+METADATA_DB = CACHE_DIR / "metadata.sqlite3"
+INFO_DIR = CACHE_DIR / "info"
+
+# YTCUTTER_YTDLP : autre binaire yt-dlp (ex: faux yt-dlp de bench/)
+YTDLP = Path(os.environ.get("YTCUTTER_YTDLP") or BIN_DIR / ("yt-dlp.exe" if sys.platform.startswith("win") else "yt-dlp"))
+
+# Utiliser ffmpeg système s'il est disponible, sinon utiliser le binaire local
+FFMPEG_LOCATION = BIN_DIR if not shutil.which("ffmpeg") else None
+FFMPEG = shutil.which("ffmpeg") or BIN_DIR / ("ffmpeg.exe" if sys.platform.startswith("win") else "ffmpeg")
+
+# Préfixe des lignes émises par yt-dlp pour chaque fichier final (--print after_move)
+FILE_MARKER = "[fichier] "
+
+# Erreur yt-dlp attribuée à une vidéo : "ERROR: [youtube] <id>: message"
+ERROR_RE = re.compile(r"^ERROR: \[[^\]]+\] ([\w-]+): (.*)")
+
+# Résultats possibles d'un job
+DONE = "done"
+PAUSED = "paused"
+NOTHING_TO_DO = "nothing_to_do"
+
+
+@dataclass
+class JobConfig:
+    """Paramètres d'un job (mêmes clés que config.json)"""
+    url: str = ""
+    start: int = 0
+    end: int = 30
+    res: int = 720
+    audio_only: bool = False
+    output: str = str(BASE_DIR)
+    mode: str = "video"  # video | playlist | channel
+    max_videos: int = 0
+    gdrive_enabled: bool = False
+    rclone_remote: str = ""
+    gdrive_folder: str = ""
+    delete_local: bool = False
+    skip_check: bool = False
+    upload_workers: int = 4
+    upload_bulk: bool = False
+    pipeline: bool = False
+    download_workers: int = 1
+    source_cache: bool = False  # garder la vidéo complète et découper en local
+    source_cache_gb: int = 20
+    cut_mode: str = CUT_FAST  # fast (copie des flux) | accurate (ré-encodage)
+    segments: list = field(default_factory=list)  # [[début, fin, nom], ...] ; vide = start/end
+    staging_gb: float = 0  # espace local max des fichiers pas encore uploadés (0 = illimité)
+    staging_files: int = 0  # nombre max de ces fichiers (0 = illimité)
+    retries: int = 3  # nouveaux essais d'une vidéo ou d'un upload en échec (erreur non définitive)
+    remote_manifest: bool = False  # identités des fichiers aussi dans un manifeste sur le remote
+    remote_rename: bool = True  # fichier déjà uploadé sous un autre nom : renommé sur le remote
+    rclone_rcd: bool = False  # une session `rclone rcd` pour tout le processus au lieu d'un rclone par opération
+    postprocess_workers: int = 0  # conversions ffmpeg (MP3, remux) en parallèle (0 = une par cœur)
+    autotune: bool = False  # téléchargements, fragments et transferts ajustés sur le débit mesuré
+    max_download_workers: int = 8  # bornes hautes de l'autotune
+    max_upload_workers: int = 16
+    max_fragments: int = 16
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construit un job à partir d'un dict (les clés inconnues sont ignorées)"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_dict(self):
+        return asdict(self)
+
+    def cut_segments(self):
+        """Plages à découper pour chaque vidéo (au moins une)"""
+        if self.segments:
+            return [make_segment(*s) for s in self.segments]
+        return [make_segment(self.start, self.end)]
+
+
+# --- Configuration ---
+def load_config(log=print):
+    """Charge la dernière configuration utilisée"""
+    try:
+        if CONFIG_FILE.exists():
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        log(f"⚠️ Erreur lors du chargement de la config: {e}")
+    return {}
+
+
+def save_config(config, log=print):
+    """Sauvegarde la configuration actuelle"""
+    try:
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+    except Exception as e:
+        log(f"⚠️ Erreur lors de la sauvegarde de la config: {e}")
+
+
+def new_log_file():
+    """Crée le fichier de log de la session avec son en-tête"""
+    log_file = DATA_DIR / f"youtube_cutter_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    try:
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(log_file, 'w', encoding='utf-8') as f:
+            f.write(f"=== YouTube Stream Cutter Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+            f.write(f"Log file: {log_file}\n")
+            f.write(f"Rclone available: {RCLONE_AVAILABLE}\n")
+            f.write("=" * 80 + "\n\n")
+    except:
+        pass
+    return log_file
+
+
+# --- Rclone pour Google Drive ---
+def probe_rclone_remotes(timeout=PROBE_TIMEOUT):
+    """Remotes rclone configurés, ou None si rclone ne répond pas"""
+    try:
+        result = subprocess.run(
+            ["rclone", "listremotes"],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return [r.strip().rstrip(':') for r in result.stdout.strip().split('\n') if r]
+
+
+def get_rclone_remotes():
+    """Liste les remotes rclone configurés"""
+    return probe_rclone_remotes() or []
+
+
+def probe_version(cmd, timeout=PROBE_TIMEOUT):
+    """Première ligne de "<outil> --version", ou None si l'outil est absent ou ne répond pas"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = result.stdout.strip().splitlines()
+    return lines[0].strip() if result.returncode == 0 and lines else None
+
+
+def ffmpeg_version():
+    line = probe_version([str(FFMPEG), "-version"])
+    # "ffmpeg version 6.1.1 Copyright ..." -> "6.1.1"
+    parts = line.split() if line else []
+    return parts[2] if len(parts) > 2 else line
+
+
+def tool_probes():
+    """Vérifications lancées en tâche de fond au démarrage de l'interface"""
+    probes = {
+        "yt-dlp": lambda: probe_version([str(YTDLP), "--version"]),
+        "ffmpeg": ffmpeg_version,
+    }
+    if RCLONE_AVAILABLE:
+        probes["rclone_remotes"] = probe_rclone_remotes
+    return probes
+
+
+class CutterEngine:
+    """Moteur de téléchargement/découpe/upload, sans interface graphique.
+
+    Les événements sont transmis par callbacks : on_log(message), on_progress(pourcentage)
+    et on_stats(dict) avec débit, ETA et compteurs (au plus 10 fois par seconde).
+    download_slots / upload_slots : sémaphores partagés entre plusieurs moteurs pour limiter
+    le nombre total de processus yt-dlp / rclone (file de jobs).
+    """
+
+    def __init__(self, on_log: Optional[Callable[[str], None]] = None,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_stats: Optional[Callable[[dict], None]] = None,
+                 log_file: Optional[Path] = None,
+                 log_writer: Optional[LogWriter] = None,
+                 download_slots: Optional[threading.Semaphore] = None,
+                 upload_slots: Optional[threading.Semaphore] = None,
+                 log_prefix: str = "",
+                 metrics_file: Optional[Path] = None):
+        self.on_log = on_log or (lambda msg: None)
+        self.on_progress = on_progress or (lambda value: None)
+        self.on_stats = on_stats or (lambda stats: None)
+        self.log_file = log_file
+        self.download_slots = download_slots
+        self.upload_slots = upload_slots
+        # Préfixe des lignes de log (ex: identifiant du job quand plusieurs tournent en parallèle)
+        self.log_prefix = log_prefix
+        # Écriture du fichier de log en tâche de fond (pas d'ouverture de fichier par ligne) ;
+        # un LogWriter fourni est partagé et reste ouvert à la fermeture du moteur
+        self.log_writer = log_writer
+        self._owns_log_writer = log_writer is None
+        if log_file and not log_writer:
+            try:
+                self.log_writer = LogWriter(log_file)
+            except OSError as e:
+                print(f"Erreur écriture log: {e}")
+        self.running = False
+        self._pause = threading.Event()
+        self._staging = None
+        self._tuner = None
+        # Mesures de la dernière exécution ; metrics_file : export texte Prometheus
+        self.metrics = None
+        self.metrics_file = metrics_file
+
+    # --- Événements ---
+    def log(self, msg):
+        if self.log_prefix:
+            # Les sauts de ligne en tête restent avant le préfixe
+            text = msg.lstrip("\n")
+            msg = msg[:len(msg) - len(text)] + self.log_prefix + text
+        # Écrire dans le fichier de log
+        if self.log_writer:
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.log_writer.write(f"[{timestamp}] {msg}")
+        self.on_log(msg)
+
+    def set_progress(self, value):
+        self.on_progress(value)
+
+    def report_progress(self, tracker):
+        self.on_progress(tracker.percent())
+        stats = tracker.stats()
+        if self._staging:
+            stats["staging"] = self._staging.describe()
+        self.on_stats(stats)
+
+    def save_metrics(self):
+        """Résumé de l'exécution dans le log, en JSON (jobs/metrics/) et au format Prometheus"""
+        metrics = self.metrics
+        metrics.finish()
+        summary = metrics.summary()
+        stages = ", ".join(
+            f"{name} {s['total']:.1f}s" + (f" ({s['count']})" if s["count"] > 1 else "")
+            for name, s in summary["stages"].items()
+        )
+        calls = summary["counters"].get("rclone_rc_calls")
+        calls = f", {calls} appel(s) rclone rcd" if calls else ""
+        self.log(f"📊 {stages or 'aucune étape'} — {sum(summary['spawns'].values())} processus lancé(s){calls}")
+        try:
+            started = datetime.fromtimestamp(metrics.started_at).strftime('%Y%m%d_%H%M%S')
+            metrics.write_summary(JOBS_DIR / "metrics" / f"{metrics.job_id or 'job'}_{started}.json")
+            if self.metrics_file:
+                metrics.write_prometheus(self.metrics_file)
+        except OSError as e:
+            self.log(f"⚠️ Erreur d'écriture des mesures: {e}")
+
+    def close(self):
+        """Vide le log en attente sur le disque"""
+        if self.log_writer and self._owns_log_writer:
+            self.log_writer.close()
+
+    # --- Pause ---
+    @property
+    def paused(self):
+        return self._pause.is_set()
+
+    def pause(self):
+        """Demande l'arrêt du job en cours (reprise possible grâce au journal)"""
+        self._pause.set()
+
+    def resume(self):
+        """Annule une demande de pause pas encore prise en compte"""
+        self._pause.clear()
+
+    # --- Helpers ---
+    def get_index(self, remote, remote_path):
+        """Index partagé du dossier distant (listé une seule fois, puis en cache)"""
+        return get_remote_index(remote, remote_path, cache_dir=CACHE_DIR, ttl=REMOTE_INDEX_TTL, log=self.log)
+
+    def get_content_index(self, remote, remote_path):
+        """Identités (vidéo, plage, format) des fichiers déjà uploadés dans ce dossier"""
+        return get_content_index(remote, remote_path, cache_dir=CACHE_DIR, log=self.log)
+
+    def get_metadata(self):
+        """Cache SQLite des infos yt-dlp par vidéo (None s'il est inutilisable)"""
+        try:
+            return get_metadata_cache(METADATA_DB, log=self.log)
+        except Exception as e:
+            self.log(f"⚠️ Cache des infos vidéo indisponible: {e}")
+            return None
+
+    def check_rclone_file_exists(self, remote, remote_path, filename):
+        """Vérifie si un fichier existe déjà sur le remote"""
+        try:
+            return self.get_index(remote, remote_path).contains(filename)
+        except:
+            return False
+
+    def find_on_remote(self, remote, remote_path, key, filename, rename=True):
+        """Vérifie si le fichier de cette identité est sur le remote, même sous un autre nom.
+
+        Un titre modifié ou une playlist réordonnée change le nom attendu : le fichier existant
+        est renommé côté serveur (rclone moveto) plutôt que retéléchargé et réuploadé.
+        """
+        index = self.get_index(remote, remote_path)
+        content = self.get_content_index(remote, remote_path)
+        previous = content.lookup(key)
+        if previous and previous != filename and index.contains(previous):
+            if not rename or index.contains(filename):
+                self.log(f"      🔗 Déjà sur Drive sous un autre nom: {previous}")
+                return True
+            count_call(self.metrics)
+            if index.move(previous, filename):
+                content.record(key, filename, index.files[filename].get("size", -1))
+                self.metrics.add("remote_renames")
+                self.log(f"      ✏️ Renommé sur Drive: {previous} -> {filename}")
+                return True
+            # Ancien nom introuvable sur le remote (index en retard) : on l'oublie et
+            # on revient à la vérification par le nom attendu
+            index.discard(previous)
+            content.forget(key)
+            previous = None
+        if self.check_rclone_file_exists(remote, remote_path, filename):
+            # Fichier reconnu par son nom (uploadé avant l'index des identités)
+            content.record(key, filename, index.files.get(filename, {}).get("size", -1))
+            return True
+        if previous:
+            # Supprimé du remote depuis
+            content.forget(key)
+        return False
+
+    def get_video_entries(self, url, audio_only, max_videos=0, incremental=False, metrics=None, single=False):
+        """Récupère les vidéos (index, id, nom de fichier) qui seraient téléchargées sans les télécharger"""
+        try:
+            self.log("   Récupération de la liste des vidéos...")
+            # Extension finale attendue (fusion mp4+m4a, ou conversion mp3)
+            ext = "mp3" if audio_only else "mp4"
+            return enumerate_videos(
+                [str(YTDLP)],
+                url,
+                ext,
+                max_videos=max_videos,
+                cache_dir=CACHE_DIR,
+                incremental=incremental,
+                metrics=metrics,
+                metadata=self.get_metadata(),
+                # Vidéo seule : "%(playlist_index)03d" vaut "NA" dans le nom écrit par yt-dlp
+                single=single,
+                log=self.log
+            )
+        except Exception as e:
+            self.log(f"❌ Erreur lors de la récupération des noms: {e}")
+            return []
+
+    def make_uploader(self, job, remote, remote_path):
+        """Construit le moteur d'upload selon les options du job"""
+        # Avec l'autotune, la borne haute ; le nombre effectif est réglé en cours d'exécution
+        workers = job.max_upload_workers if job.autotune else job.upload_workers
+        return Uploader(
+            remote,
+            remote_path,
+            self.get_index(remote, remote_path),
+            workers=workers,
+            bulk=job.upload_bulk,
+            transfers=workers,
+            slots=self.upload_slots,
+            retries=job.retries,
+            should_stop=lambda: self.paused,
+            metrics=self.metrics,
+            log=self.log
+        )
+
+    def fetch_source(self, cache, entry, format_selector, handle_line, retries=0, fragments=0, reuse=None,
+                     on_failure=None):
+        """Télécharge la vidéo complète dans le cache source ; retourne son chemin ou None
+        (on_failure(catégorie) est appelé quand la vidéo est abandonnée)"""
+        cmd = [str(YTDLP)]
+        if FFMPEG_LOCATION:
+            cmd += ["--ffmpeg-location", str(FFMPEG_LOCATION)]
+        if fragments:
+            # Fragments DASH/HLS téléchargés en parallèle (vidéo complète uniquement)
+            cmd += ["--concurrent-fragments", str(fragments)]
+        cmd += [
+            "-f", format_selector,
+            "--newline",
+            "--print", f"after_move:{FILE_MARKER}%(filepath)s",
+            "--no-quiet",
+        ]
+        cmd += PROGRESS_ARGS
+        if reuse:
+            cmd += reuse.write_args()
+        url = video_url(entry.video_id)
+        cmd += ["-o", cache.download_template(entry.video_id, format_selector)]
+        bucket = host_bucket(urlparse(url).hostname)
+
+        attempt = 0
+        while True:
+            if not bucket.acquire(lambda: self.paused):
+                return None
+            errors = []
+            # Infos déjà extraites (autre résolution, autre plage...) : pas de nouvelle extraction
+            cached = reuse.args(entry.video_id) if reuse else None
+            with self.download_slots or nullcontext(), self.metrics.timer("download_source"):
+                process = subprocess.Popen(
+                    cmd + (cached or ["--", url]),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True
+                )
+                self.metrics.spawn("yt-dlp")
+                path = None
+                for line in process.stdout:
+                    if self.paused:
+                        process.terminate()
+                        try:
+                            process.wait(timeout=5)
+                        except subprocess.TimeoutExpired:
+                            process.kill()
+                        return None
+                    if line.startswith(FILE_MARKER):
+                        path = Path(line[len(FILE_MARKER):].strip())
+                        continue
+                    if line.startswith("ERROR:"):
+                        errors.append(line)
+                    handle_line(line, prefix=f"[{entry.index:03d}] ")
+                process.wait()
+
+            if reuse:
+                reuse.collect(entry.video_id)
+            if process.returncode == 0 and path and path.is_file():
+                return cache.add(entry.video_id, format_selector, path)
+            if cached:
+                self.log(f"🔁 [{entry.index:03d}] Infos en cache refusées, nouvelle extraction")
+                continue
+            category = classify_failure("".join(errors))
+            attempt += 1
+            delay = backoff_delay(attempt, category)
+            if category == RATE_LIMITED:
+                bucket.penalize(delay)
+            if category == PERMANENT or attempt > retries:
+                self.log(f"⚠️ [{entry.index:03d}] Source non téléchargée (code {process.returncode})")
+                if on_failure:
+                    on_failure(category)
+                return None
+            self.log(f"🔁 [{entry.index:03d}] {LABELS[category]}, nouvel essai {attempt}/{retries} dans {delay:.0f}s")
+            self.metrics.add("retries")
+            if not wait(delay, lambda: self.paused):
+                return None
+
+    # --- Download logic ---
+    def run(self, job: JobConfig):
+        """Exécute un job ; retourne DONE, PAUSED ou NOTHING_TO_DO"""
+        url = job.url.strip()
+        if not url:
+            raise ValueError("URL manquante")
+
+        self.running = True
+        self.metrics = Metrics()
+        try:
+            # Une pause demandée avant le démarrage (Ctrl+C, arrêt de la file) est conservée
+            return self._run(job, url)
+        finally:
+            self.running = False
+            self._staging = None
+            # Le prochain run() repart sans pause
+            self._pause.clear()
+            if self._tuner:
+                self._tuner.stop()
+                self._tuner = None
+            self.save_metrics()
+
+    def _run(self, job, url):
+        log = self.log
+        set_progress = self.set_progress
+
+        start = job.start
+        end = job.end
+        res = job.res
+        audio_only = job.audio_only
+        out_dir = Path(job.output)
+        mode = job.mode
+        max_videos = job.max_videos
+        # Plusieurs plages par vidéo : un seul passage yt-dlp, un fichier par plage
+        segments = job.cut_segments()
+        multi = len(segments) > 1
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        format_selector = (
+            "bestaudio/best"
+            if audio_only else
+            f"bestvideo[height<={res}][ext=mp4]+bestaudio[ext=m4a]/best"
+        )
+
+        # Pour les chaînes, ajouter /videos pour avoir toutes les vidéos
+        list_url = url
+        if mode == "channel" and "@" in url and "/videos" not in url:
+            list_url = url.rstrip("/") + "/videos"
+
+        remote = job.rclone_remote.strip()
+        remote_path = job.gdrive_folder.strip()
+        upload_enabled = job.gdrive_enabled and RCLONE_AVAILABLE
+        # État final d'une vidéo : uploadée si l'upload est actif, sinon découpée
+        final_state = "uploaded" if upload_enabled and remote else "cut"
+
+        # Journal du job : une pause ou un crash reprend à la première vidéo non terminée
+        params = dict(
+            url=list_url, start=start, end=end, res=res, audio_only=audio_only,
+            max_videos=max_videos, remote=remote if upload_enabled else "", remote_path=remote_path,
+            output=str(out_dir.resolve())
+        )
+        if multi:
+            params["segments"] = [list(s) for s in segments]
+        journal = JobJournal(JOBS_DIR, job_id(**params), log=log)
+        metrics = self.metrics
+        metrics.job_id = journal.job_id
+        if upload_enabled and remote:
+            # Session rclone rcd (une par processus, partagée par les jobs) : listings,
+            # copies et renommages sans nouveau processus
+            if job.rclone_rcd and get_backend().spawns:
+                if start_session(log=log):
+                    metrics.spawn("rclone")
+                    log("🔌 Session rclone rcd démarrée")
+                else:
+                    log("⚠️ Session rclone rcd indisponible, un processus rclone par opération")
+
+            # Listings rclone de l'index Drive pendant cette exécution
+            index = self.get_index(remote, remote_path)
+            marks = (index.listings, index.listing_seconds)
+
+            def count_listings(m):
+                if index.listings > marks[0]:
+                    count_call(m, index.listings - marks[0])
+                    m.observe("drive_list", index.listing_seconds - marks[1])
+            metrics.on_finish(count_listings)
+
+        # Identités des fichiers uploadés : déduplication indépendante des noms de fichiers
+        content = self.get_content_index(remote, remote_path) if upload_enabled and remote else None
+        if content and job.remote_manifest:
+            count_call(metrics)
+            content.load_manifest()
+
+        def save_manifest():
+            if content and job.remote_manifest and content.dirty:
+                count_call(metrics)
+                content.save_manifest()
+
+        if final_state == "cut":
+            # Sans upload, le fichier local est le résultat : une vidéo découpée dont les
+            # fichiers ont disparu depuis est refaite
+            gone = [vid for vid, state in journal.states.items() if state == "cut" and not journal.has_files(vid)]
+            if gone:
+                log(f"↩️ {len(gone)} vidéo(s) découpée(s) dont les fichiers ont disparu, à refaire")
+                journal.reopen(gone)
+
+        # Fichiers déjà découpés lors d'une exécution précédente, pas encore uploadés
+        leftover_files = journal.local_files(final_state) if final_state != "cut" else []
+
+        # Liste des vidéos à télécharger (récupérée une seule fois, réutilisée par le téléchargement parallèle)
+        pending = journal.pending(final_state)
+        if pending:
+            done = len(journal.entries) - len(pending)
+            log(f"↩️ Reprise du job {journal.job_id}: {done}/{len(journal.entries)} vidéo(s) déjà traitée(s)")
+            entries = [e for e in pending if not journal.is_done(e.video_id, "cut")]
+        else:
+            # Chaînes : les nouvelles vidéos arrivent en tête, on ne liste que celles-ci
+            incremental = mode == "channel"
+            with metrics.timer("enumerate"):
+                entries = self.get_video_entries(list_url, audio_only, max_videos, incremental, metrics=metrics,
+                                                 single=mode == "video")
+            if entries:
+                journal.record_entries(entries)
+                # Vidéos abandonnées (erreur définitive) ou écartées lors d'une exécution précédente : ignorées
+                entries = [e for e in entries if not journal.is_done(e.video_id, "cut") and not journal.is_closed(e.video_id)]
+                if not entries and not leftover_files:
+                    log("\n🎉 Toutes les vidéos de ce job sont déjà traitées !")
+                    return NOTHING_TO_DO
+
+            # Vérifier les fichiers existants sur le Drive avant de télécharger
+            files_to_skip = []
+            should_skip = job.skip_check
+
+            if upload_enabled and remote and entries and not should_skip:
+                log("🔍 Vérification des fichiers existants sur le Drive...")
+                with metrics.timer("drive_check"):
+                    # Un seul listing (ou le cache disque encore valide), les vérifications suivantes sont en mémoire
+                    self.get_index(remote, remote_path).ensure_loaded()
+                    log(f"📋 {len(entries)} vidéo(s) à vérifier")
+
+                    for entry in entries:
+                        names = [segment_filename(entry.filename, s) for s in segments] if multi else [entry.filename]
+                        if all(
+                            self.find_on_remote(remote, remote_path, content_key(entry.video_id, s, format_selector),
+                                                name, rename=job.remote_rename)
+                            for s, name in zip(segments, names)
+                        ):
+                            files_to_skip.append(entry.filename)
+                            journal.set_state(entry.video_id, "uploaded")
+                            log(f"      ⏭️ Déjà sur Drive: {entry.filename}" + (f" ({len(names)} plages)" if multi else ""))
+                metrics.set("videos_skipped", len(files_to_skip))
+
+                if files_to_skip:
+                    log(f"\n✅ {len(files_to_skip)} fichier(s) déjà présent(s), {len(entries) - len(files_to_skip)} à télécharger")
+                    entries = [e for e in entries if e.filename not in set(files_to_skip)]
+
+                    # Si tous les fichiers existent déjà, arrêter
+                    if not entries and not leftover_files:
+                        save_manifest()
+                        log("\n🎉 Tous les fichiers existent déjà sur le Drive !")
+                        return NOTHING_TO_DO
+                else:
+                    log("✅ Aucun fichier existant, téléchargement complet")
+            elif not entries and mode != "video":
+                log("⚠️ Impossible de récupérer la liste des fichiers, téléchargement normal")
+
+        # Infos yt-dlp des exécutions précédentes (durée, formats) : partagées par le listage
+        # et les téléchargements
+        metadata = self.get_metadata()
+        reuse = InfoReuse(metadata, INFO_DIR, metrics=metrics) if metadata else None
+
+        # Vidéos terminées avant le début des plages (durée connue) : sautées sans requête
+        short = [e for e in entries if metadata and too_short(metadata.duration(e.video_id), segments)]
+        if short:
+            for entry in short:
+                # Écartée du job : la reprise suivante ne l'attend plus
+                journal.set_state(entry.video_id, "skipped")
+                log(f"   ⏭️ Trop courte ({format_eta(metadata.duration(entry.video_id))}): {entry.filename}")
+            metrics.set("videos_too_short", len(short))
+            entries = [e for e in entries if e not in short]
+            if not entries and not leftover_files:
+                save_manifest()
+                log(f"\n⏭️ {len(short)} vidéo(s) trop courte(s) pour les plages demandées, rien à télécharger")
+                return NOTHING_TO_DO
+
+        # Plages téléchargées mais pas encore converties lors d'une exécution interrompue :
+        # l'archive de yt-dlp ne les referait pas, leur conversion est reprise directement
+        unconverted = {}
+        for entry in entries:
+            files = {p.stem: p for p in journal.files.get(entry.video_id, []) if p.is_file()}
+            if journal.states.get(entry.video_id) == "downloading" and len(files) >= len(segments):
+                unconverted[entry.video_id] = list(files.values())
+        if unconverted:
+            entries = [e for e in entries if e.video_id not in unconverted]
+
+        cmd = [str(YTDLP)]
+
+        # Ajouter --ffmpeg-location seulement si on utilise le binaire local
+        if FFMPEG_LOCATION:
+            cmd += ["--ffmpeg-location", str(FFMPEG_LOCATION)]
+
+        # Découpage temporel (appliqué à chaque vidéo)
+        cmd += [
+            "--download-sections", sections_arg(segments),
+        ]
+
+        cmd += [
+            "-f", format_selector,
+            "--newline",
+            # Chemin de chaque fichier final, sans repasser en mode silencieux
+            "--print", f"after_move:{FILE_MARKER}%(id)s\t%(filepath)s",
+            "--no-quiet",
+            # Les vidéos déjà téléchargées par ce job ne sont pas refaites
+            "--download-archive", str(journal.archive),
+        ]
+        # Progression structurée (JSON par vidéo) au lieu des lignes "[download] xx%"
+        cmd += PROGRESS_ARGS
+        if reuse:
+            cmd += reuse.write_args()
+
+        # Budget disque : pas de nouveau téléchargement tant que les fichiers en attente
+        # d'upload (et de suppression) dépassent la limite
+        staging = None
+        if job.staging_gb or job.staging_files:
+            if upload_enabled and remote and job.delete_local:
+                staging = StagingBudget(int(job.staging_gb * 1024 ** 3), job.staging_files, log=log)
+                self._staging = staging
+                # Taille estimée de chaque plage avant son téléchargement
+                cmd += SIZE_ARGS
+                log(f"💽 Budget disque: {staging.describe()}")
+            else:
+                log("⚠️ Budget disque ignoré : il nécessite l'upload avec suppression des fichiers locaux")
+
+        # Cache source : vidéo complète gardée en local, chaque plage est découpée par ffmpeg
+        source_cache = None
+        if job.source_cache and entries:
+            source_cache = SourceCache(CACHE_DIR, max_bytes=job.source_cache_gb * 1024 ** 3, log=log)
+
+        # Rythme des lancements yt-dlp partagé par tous les jobs vers le même hôte
+        bucket = host_bucket(urlparse(list_url).hostname or "youtube")
+
+        # Réglage auto : départ des dernières bonnes valeurs pour cet hôte et ce remote
+        tuner = None
+        tuned = {"fragments": 0}
+        if job.autotune:
+            tuner = AutoTuner(AUTOTUNE_FILE, errors=lambda: metrics.counters.get("retries", 0), log=log)
+            self._tuner = tuner
+
+        def knob(name, key, default, high, apply):
+            def set_value(value):
+                apply(value)
+                metrics.gauge(f"autotune_{name}", value)
+            return Knob(name, tuner.saved(key, name, default), 1, high, set_value, log=log)
+
+        # Téléchargement parallèle : un yt-dlp par vidéo, sur la liste déjà récupérée
+        workers = job.download_workers
+        # Plusieurs plages : début de la plage dans le nom, remplacé ensuite par son nom
+        name_suffix = SECTION_TEMPLATE if multi else ""
+        scheduler = None
+        # Vidéos dont les infos sont en cache : relancées sans nouvelle extraction
+        cached_count = sum(1 for e in entries if reuse.available(e.video_id)) if reuse else 0
+        # Liste connue : chaque vidéo est lancée séparément, par son ID (les positions de la liste
+        # en cache ou du journal ne sont plus forcément celles de la playlist en ligne), avec son
+        # nom de fichier attendu, l'attente du budget disque et --load-info-json par vidéo
+        if mode != "video" and entries and not source_cache:
+            scheduler = DownloadScheduler(
+                cmd,
+                out_dir,
+                # Avec l'autotune, la borne haute ; le nombre effectif est réglé en cours d'exécution
+                concurrency=job.max_download_workers if tuner else workers,
+                on_start=lambda entry: journal.set_state(entry.video_id, "downloading"),
+                on_line=lambda entry, line: handle_line(line, prefix=f"[{entry.index:03d}] "),
+                on_done=lambda entry, code, category: video_done(entry.video_id, category if code else None),
+                should_stop=lambda: self.paused,
+                name_suffix=name_suffix,
+                slots=self.download_slots,
+                before_start=(lambda entry: staging.acquire(entry.video_id, should_stop=lambda: self.paused))
+                if staging else None,
+                retries=job.retries,
+                bucket=bucket,
+                cached_input=(lambda entry: reuse.args(entry.video_id)) if reuse else None,
+                metrics=metrics,
+                log=log
+            )
+
+        def single_cmd(cached=None):
+            """Un seul yt-dlp : vidéo unique, ou liste entière quand elle n'a pas pu être récupérée"""
+            args = list(cmd)
+            if mode != "video" and max_videos > 0:
+                # Limiter le nombre de vidéos si spécifié
+                args += ["--playlist-end", str(max_videos)]
+            return args + [
+                "-o", str(out_dir / f"%(playlist_index)03d - %(title)s{name_suffix}.%(ext)s"),
+            ] + (cached or ["--", list_url])  # "--" : l'URL n'est jamais lue comme une option
+
+        # Upload en continu : chaque fichier terminé part vers le Drive pendant
+        # que les vidéos suivantes se téléchargent
+        file_ids = {}
+        file_keys = {}  # fichier -> identité (vidéo, plage, format)
+        uploaded = defaultdict(set)  # video_id -> fichiers uploadés
+
+        def upload_done(file_path, ok, deleted):
+            video_id = file_ids.get(file_path)
+            if ok and content and file_path in file_keys:
+                size = self.get_index(remote, remote_path).files.get(file_path.name, {}).get("size", -1)
+                content.record(file_keys[file_path], file_path.name, size)
+            if video_id and ok:
+                uploaded[video_id].add(file_path)
+                # Vidéo terminée quand toutes ses plages sont uploadées
+                if len(uploaded[video_id]) >= len(segments):
+                    journal.set_state(video_id, "deleted" if deleted else "uploaded")
+            if staging:
+                # Un fichier resté en local (échec) n'est plus compté, sinon tout resterait bloqué
+                if not deleted:
+                    log(f"⚠️ {file_path.name} reste en local, hors budget disque")
+                staging.release(file_path)
+                metrics.gauge("staging_bytes", staging.usage()[0])
+                log(f"💽 Espace local: {staging.describe()}")
+
+        pipeline = None
+        # Le budget disque repose sur l'upload en continu (place libérée fichier par fichier)
+        if upload_enabled and remote and (job.pipeline or staging):
+            pipeline = UploadPipeline(
+                self.make_uploader(job, remote, remote_path),
+                delete_local=job.delete_local,
+                on_done=upload_done,
+                log=log
+            ).start()
+            log(f"📤 Upload en continu vers {remote} activé")
+
+        produced_files = []
+
+        # Conversions (MP3, remux) hors de yt-dlp : le réseau n'attend plus le CPU
+        postprocessor = PostProcessor(
+            FFMPEG,
+            audio_only=audio_only,
+            workers=job.postprocess_workers,
+            on_done=lambda file_path, video_id, segment: file_cut(file_path, video_id, segment),
+            metrics=metrics,
+            log=log
+        )
+
+        def file_ready(file_path, video_id=None, segment=None):
+            if video_id:
+                file_ids[file_path] = video_id
+                if segment or not multi:
+                    file_keys[file_path] = content_key(video_id, segment or segments[0], format_selector)
+            produced_files.append(file_path)
+            metrics.add("files_produced")
+            try:
+                metrics.add("bytes_produced", file_path.stat().st_size)
+            except OSError:
+                pass
+            if staging:
+                staging.add_file(video_id or file_path, file_path)
+                metrics.gauge("staging_bytes", staging.usage()[0])
+            if pipeline:
+                # Bloque si la file est pleine : yt-dlp attend que l'upload rattrape
+                pipeline.submit(file_path)
+
+        tracker = ProgressTracker(total_videos=len(entries) + len(unconverted))
+        cut_count = defaultdict(int)  # video_id -> plages découpées
+        received = defaultdict(int)  # video_id -> plages sorties de yt-dlp (converties ou en conversion)
+        count_lock = threading.Lock()
+
+        def downloaded(video_id):
+            """Toutes les plages sont téléchargées (la conversion peut être encore en cours)"""
+            return journal.is_done(video_id, "cut") or received[video_id] >= len(segments)
+
+        def video_done(video_id, category=None):
+            if category == PERMANENT and not downloaded(video_id):
+                # Erreur définitive (vidéo privée, supprimée...) : la vidéo sort du job, la reprise
+                # suivante ne l'attend plus
+                journal.set_state(video_id, "failed")
+            if staging:
+                staging.finish(video_id)
+            if tracker.finish(video_id):
+                self.report_progress(tracker)
+
+        def handle_line(line, prefix=""):
+            """Traite une ligne de sortie yt-dlp (progression, fichier terminé ou log)"""
+            event = parse_progress_event(line)
+            if event:
+                # Interface et log rafraîchis au plus 10 fois par seconde
+                if tracker.update(event):
+                    self.report_progress(tracker)
+                    size = f" de {format_bytes(event.total)}" if event.total else ""
+                    speed = f" à {format_bytes(event.speed)}/s" if event.speed else ""
+                    log(f"{prefix}[download] {event.percent:5.1f}%{size}{speed} ETA {format_eta(event.eta)}")
+                return
+            if staging and line.startswith(SIZE_MARKER):
+                video_id, section, size = parse_size_line(line)
+                if size:
+                    staging.estimate(video_id, size, section)
+                return
+            if line.startswith(FILE_MARKER):
+                video_id, _, path = line[len(FILE_MARKER):].strip().partition("\t")
+                if reuse:
+                    reuse.collect(video_id)
+                file_path = Path(path)
+                name, section_start = split_section_name(file_path.name)
+                segment = find_segment(segments, section_start) if multi else None
+                if segment:
+                    # "001 - Titre @60.0.mp4" -> "001 - Titre - Intro.mp4"
+                    target = file_path.with_name(segment_filename(name, segment))
+                    try:
+                        file_path.replace(target)
+                        file_path = target
+                    except OSError as e:
+                        log(f"⚠️ Renommage impossible ({file_path.name}): {e}")
+                file_received(file_path, video_id, segment)
+                return
+            log(prefix + line.strip())
+
+        def file_received(file_path, video_id, segment=None):
+            """Plage sortie de yt-dlp : convertie en tâche de fond si besoin"""
+            with count_lock:
+                received[video_id] += 1
+            if postprocessor.needs(file_path):
+                # Plage brute notée au journal : reprise de sa conversion après un crash
+                journal.set_state(video_id, "downloading", file=file_path)
+                postprocessor.submit(file_path, video_id, segment)
+            else:
+                file_cut(file_path, video_id, segment)
+
+        def file_cut(file_path, video_id, segment=None):
+            """Fichier final d'une plage (directement de yt-dlp ou après conversion)"""
+            with count_lock:
+                cut_count[video_id] += 1
+                state = "cut" if cut_count[video_id] >= len(segments) else "downloading"
+            journal.set_state(video_id, state, file=file_path)
+            log(f"📁 Fichier prêt: {file_path.name}")
+            file_ready(file_path, video_id, segment)
+            if state == "cut":
+                metrics.add("videos_cut")
+                video_done(video_id)
+
+        def pause_stop():
+            metrics.set("bytes_downloaded", tracker.stats()["downloaded"])
+            # Les plages déjà téléchargées sont converties avant l'arrêt
+            postprocessor.close()
+            if pipeline:
+                log("⏸️ Fin des uploads en cours...")
+                pipeline.close()
+            save_manifest()
+            log("⏸️ Téléchargement mis en pause")
+            return PAUSED
+
+        def tune_uploads(uploader):
+            """Transferts rclone simultanés ajustés sur le débit d'upload mesuré"""
+            def set_transfers(value):
+                uploader.limit.set_target(value)
+                uploader.transfers = value
+            key = f"upload:{remote}"
+            tuner.add_group(key, lambda: metrics.counters.get("bytes_uploaded", 0), uploader.bucket,
+                            [knob("transfers", key, job.upload_workers, job.max_upload_workers, set_transfers)])
+
+        if tuner:
+            host_key = f"download:{urlparse(list_url).hostname or 'youtube'}"
+            knobs = []
+            if scheduler:
+                knobs.append(knob("workers", host_key, workers, job.max_download_workers, scheduler.limit.set_target))
+            if source_cache:
+                # Fragments parallèles : seulement pour les vidéos complètes (les plages passent par ffmpeg)
+                knobs.append(knob("fragments", host_key, 1, job.max_fragments, lambda v: tuned.update(fragments=v)))
+            if knobs:
+                tuner.add_group(host_key, lambda: tracker.received, bucket, knobs)
+            if pipeline:
+                tune_uploads(pipeline.uploader)
+            tuner.start()
+
+        log("▶ Démarrage...")
+        set_progress(0)
+
+        # Fichiers d'une exécution précédente restés en local : upload direct
+        if leftover_files:
+            log(f"↩️ {len(leftover_files)} fichier(s) déjà découpé(s) en attente d'upload")
+            ids = {path: vid for vid, paths in journal.files.items() for path in paths}
+            for file_path in leftover_files:
+                entry = journal.entries.get(ids.get(file_path))
+                segment = next((s for s in segments if entry and segment_filename(entry.filename, s) == file_path.name),
+                               None) if multi else None
+                file_ready(file_path, ids.get(file_path), segment)
+
+        if unconverted:
+            log(f"↩️ {len(unconverted)} vidéo(s) téléchargée(s) en attente de conversion")
+            for video_id, files in unconverted.items():
+                entry = journal.entries[video_id]
+                for file_path in files:
+                    segment = next((s for s in segments
+                                    if Path(segment_filename(entry.filename, s)).stem == file_path.stem),
+                                   None) if multi else None
+                    file_received(file_path, video_id, segment)
+
+        if source_cache:
+            log(f"💾 Cache source: {len(entries)} vidéo(s), découpe locale ({job.cut_mode})")
+            for entry in entries:
+                if self.paused:
+                    return pause_stop()
+                if staging and not staging.acquire(entry.video_id, should_stop=lambda: self.paused):
+                    return pause_stop()
+                journal.set_state(entry.video_id, "downloading")
+                source = source_cache.get(entry.video_id, format_selector)
+                if source:
+                    log(f"💾 Source déjà en cache: {entry.filename}")
+                else:
+                    failure = []
+                    source = self.fetch_source(source_cache, entry, format_selector, handle_line,
+                                               retries=job.retries, fragments=tuned["fragments"], reuse=reuse,
+                                               on_failure=failure.append)
+                    if self.paused:
+                        return pause_stop()
+                if not source:
+                    metrics.add("videos_failed")
+                    video_done(entry.video_id, failure[0] if failure else None)
+                    continue
+                for segment in segments:
+                    dest = out_dir / (segment_filename(entry.filename, segment) if multi else entry.filename)
+                    with metrics.timer("cut"):
+                        metrics.spawn("ffmpeg")
+                        cut = cut_local(FFMPEG, source, segment.start, segment.end, dest,
+                                        mode=job.cut_mode, audio_only=audio_only, log=log)
+                    if cut:
+                        handle_line(f"{FILE_MARKER}{entry.video_id}\t{dest}")
+                if cut_count[entry.video_id] < len(segments):
+                    video_done(entry.video_id)
+            log(f"💾 Cache source: {format_bytes(source_cache.total_size())} utilisé(s)")
+        elif scheduler:
+            log(f"⚡ {len(entries)} vidéo(s), {scheduler.limit.limit} téléchargement(s) en parallèle")
+            if cached_count:
+                log(f"♻️ {cached_count} vidéo(s) déjà extraite(s), infos yt-dlp en cache réutilisées")
+            codes = scheduler.run(entries)
+            if scheduler.stopped or self.paused:
+                return pause_stop()
+            failed = [vid for vid, code in codes.items() if code]
+            if failed:
+                metrics.add("videos_failed", len(failed))
+                log(f"⚠️ {len(failed)} vidéo(s) en échec")
+        elif entries or mode == "video" or not journal.entries:
+            items = entries
+            attempt = 0
+            # Vidéo unique déjà extraite : infos en cache au premier essai
+            single = entries[0] if mode == "video" and len(entries) == 1 and reuse else None
+            cached = reuse.args(single.video_id) if single and reuse.available(single.video_id) else None
+            while True:
+                if not bucket.acquire(lambda: self.paused):
+                    return pause_stop()
+                interrupted = False
+                errors = {}  # video_id -> message d'erreur yt-dlp
+                output = []
+                with self.download_slots or nullcontext(), metrics.timer("download"):
+                    process = subprocess.Popen(
+                        single_cmd(cached),
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True
+                    )
+                    metrics.spawn("yt-dlp")
+
+                    for line in process.stdout:
+                        # Vérifier si on doit mettre en pause
+                        if self.paused:
+                            log("⏸️ Pause demandée, arrêt du processus...")
+                            process.terminate()
+                            try:
+                                process.wait(timeout=5)
+                            except subprocess.TimeoutExpired:
+                                process.kill()
+                            interrupted = True
+                            break
+
+                        if line.startswith("ERROR:"):
+                            output.append(line)
+                            match = ERROR_RE.match(line)
+                            if match:
+                                errors[match.group(1)] = match.group(2)
+                        handle_line(line)
+
+                    process.wait()
+                if interrupted:
+                    return pause_stop()
+                if process.returncode == 0:
+                    break
+                if cached:
+                    log("🔁 Infos en cache refusées, nouvelle extraction")
+                    cached = reuse.args(single.video_id)
+                    continue
+
+                # Seules les vidéos en échec sont retentées (l'archive évite de refaire les autres)
+                failed = [e for e in items if not downloaded(e.video_id)]
+                retry = [e for e in failed if classify_failure(errors.get(e.video_id, "")) != PERMANENT]
+                category = classify_failure("".join(output))
+                attempt += 1
+                delay = backoff_delay(attempt, category)
+                if category == RATE_LIMITED:
+                    bucket.penalize(delay)
+                if (not retry if items else category == PERMANENT) or attempt > job.retries:
+                    log(f"⚠️ yt-dlp a échoué (code {process.returncode}): {error_excerpt(''.join(output))}")
+                    break
+                what = f"{len(retry)} vidéo(s)" if items else "téléchargement"
+                log(f"🔁 {LABELS[category]}, nouvel essai ({what}) {attempt}/{job.retries} dans {delay:.0f}s")
+                metrics.add("retries")
+                if not wait(delay, lambda: self.paused):
+                    return pause_stop()
+                items = retry
+            failed = [e for e in entries if not downloaded(e.video_id)]
+            for entry in failed:
+                error = errors.get(entry.video_id)
+                video_done(entry.video_id, classify_failure(error) if error else None)
+                log(f"   ❌ [{entry.index:03d}] {error or 'non téléchargée'}")
+            if failed:
+                metrics.add("videos_failed", len(failed))
+                log(f"⚠️ {len(failed)} vidéo(s) en échec")
+        if reuse:
+            # Infos déposées par les vidéos en échec (durée, formats) : gardées aussi
+            reuse.collect()
+        with metrics.timer("postprocess_drain"):
+            postprocessor.close()
+        set_progress(100)
+        stats = tracker.stats()
+        metrics.set("bytes_downloaded", stats["downloaded"])
+        log(f"✅ Téléchargement terminé ({format_bytes(stats['downloaded'])}, moyenne {format_bytes(stats['average_speed'])}/s)")
+
+        if pipeline:
+            log("⏳ Attente de la fin des uploads...")
+            with metrics.timer("upload_drain"):
+                results = pipeline.close()
+            failed = [f for f, ok in results.items() if not ok]
+            log(f"📤 {len(results) - len(failed)}/{len(results)} fichier(s) uploadé(s)")
+            for f in failed:
+                log(f"   ❌ Non uploadé: {f.name}")
+            if staging:
+                log(f"💽 Espace local max utilisé: {format_bytes(staging.peak_bytes)}")
+
+        # Upload vers rclone si activé (par batch de 10 vidéos)
+        elif upload_enabled:
+            if not remote:
+                log("❌ Aucun remote rclone sélectionné")
+            else:
+                log(f"\n📤 Début de l'upload vers {remote}...")
+
+                # Uniquement les fichiers produits par ce téléchargement
+                all_files = [f for f in dict.fromkeys(produced_files) if f.is_file()]
+
+                if not all_files:
+                    log("❌ Aucun fichier à uploader")
+                else:
+                    uploader = self.make_uploader(job, remote, remote_path)
+                    if tuner:
+                        tune_uploads(uploader)
+                    batch_size = 10
+
+                    # Uploader par batch de 10
+                    for i in range(0, len(all_files), batch_size):
+                        batch = all_files[i:i + batch_size]
+                        log(f"\n📦 Batch {i//batch_size + 1}/{(len(all_files) + batch_size - 1)//batch_size} ({len(batch)} fichiers)")
+
+                        results = uploader.upload_batch(batch)
+                        # Seuls les fichiers confirmés sur le remote peuvent être supprimés
+                        uploaded_files = [f for f, ok in results.items() if ok]
+                        for file in uploaded_files:
+                            upload_done(file, True, False)
+
+                        # Supprimer les fichiers du batch si l'option est activée
+                        if job.delete_local and uploaded_files:
+                            log(f"🗑️ Suppression des fichiers du batch...")
+                            for file in uploaded_files:
+                                try:
+                                    file.unlink()
+                                    upload_done(file, True, True)
+                                    log(f"✅ Supprimé: {file.name}")
+                                except Exception as e:
+                                    log(f"❌ Erreur de suppression {file.name}: {e}")
+
+        save_manifest()
+        log("\n🎉 Traitement terminé")
+        return DONE
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import re
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Listage complet au moins une fois par jour : le listage incrémental ne voit que les nouvelles
+# vidéos, pas celles supprimées de la chaîne depuis
+FULL_LIST_INTERVAL = 24 * 3600
+
+# Une vidéo d'une playlist/chaîne : index dans la liste, identifiant YouTube, nom de fichier attendu
+VideoEntry = namedtuple("VideoEntry", "index video_id filename")
+
+
+def list_key(url):
+    """Clé de cache d'une liste : ID de playlist, @handle ou ID de chaîne"""
+    parsed = urlparse(url)
+    playlist = parse_qs(parsed.query).get("list")
+    if playlist:
+        return f"playlist_{playlist[0]}"
+    match = re.search(r"/(@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)(/[^?#]*)?", parsed.path)
+    if match:
+        tab = (match.group(2) or "/videos").strip("/") or "videos"
+        name = match.group(1).replace("/", "_")
+        return f"channel_{name}_{tab}"
+    return "url_" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+class PlaylistCache:
+    """Cache local des listes de vidéos, une entrée JSON par playlist/chaîne"""
+
+    def __init__(self, cache_dir):
+        self.dir = Path(cache_dir) / "playlists"
+
+    def _path(self, key):
+        safe = re.sub(r"[^\w@.-]", "_", key)
+        return self.dir / f"{safe}.json"
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, url, items, complete, full_at=None):
+        """full_at : date du dernier listage complet (maintenant par défaut)"""
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp = path.with_suffix(".tmp")
+            now = time.time()
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"url": url, "updated_at": now, "full_at": full_at or now, "complete": complete,
+                           "items": items}, f)
+            tmp.replace(path)
+        except OSError:
+            pass
+
+
+def _stream_flat(cmd, known_ids, log):
+    """Lit la sortie de yt-dlp ligne par ligne ; s'arrête au premier ID déjà connu"""
+    items = []
+    hit_known = False
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    # stderr lu en parallèle : un pipe plein bloquerait yt-dlp (et donc le listage)
+    stderr_tail = deque(maxlen=50)
+    reader = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+    reader.start()
+    try:
+        for line in process.stdout:
+            parts = line.rstrip("\n").split("\t", 2)
+            if len(parts) != 3 or not parts[0]:
+                continue
+            video_id, duration, name = parts
+            if video_id in known_ids:
+                hit_known = True
+                break
+            item = {"id": video_id, "name": name}
+            try:
+                item["duration"] = float(duration)
+            except ValueError:
+                pass  # "NA" : durée inconnue dans la liste
+            items.append(item)
+            if len(items) % 200 == 0:
+                log(f"   … {len(items)} vidéo(s) listée(s)")
+    finally:
+        if hit_known:
+            process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    reader.join(timeout=5)
+
+    ok = hit_known or process.returncode == 0
+    if not ok:
+        stderr = "".join(stderr_tail)
+        log(f"   ⚠️ Erreur lors de la récupération (code {process.returncode})")
+        log(f"   {stderr[:200]}")
+    return items, hit_known, ok
+
+
+def enumerate_videos(base_cmd, url, ext, max_videos=0, cache_dir=None, incremental=False, metrics=None,
+                     metadata=None, single=False, log=print):
+    """Liste rapide (--flat-playlist) des vidéos d'une playlist/chaîne, avec cache local.
+
+    En mode incrémental (chaînes : les vidéos les plus récentes arrivent en premier),
+    seules les entrées plus récentes que la liste en cache sont récupérées.
+    La durée de chaque vidéo, quand la liste la donne, est notée dans `metadata`.
+    Une vidéo seule (`single`) est nommée comme par yt-dlp, sans position : "NA - Titre.ext".
+    """
+    cache = PlaylistCache(cache_dir) if cache_dir else None
+    key = list_key(url)
+    cached = cache.load(key) if cache else None
+
+    known_ids = set()
+    if (incremental and cached and cached.get("complete")
+            and time.time() - cached.get("full_at", 0) < FULL_LIST_INTERVAL):
+        known_ids = {item["id"] for item in cached["items"]}
+
+    cmd = list(base_cmd) + [
+        "--flat-playlist",
+        # yt-dlp nettoie le titre comme pour un vrai nom de fichier
+        "-o", "%(title)s",
+        "--print", "%(id)s\t%(duration)s\t%(filename)s",
+        "--quiet",
+        "--no-warnings",
+    ]
+    if max_videos > 0 and not known_ids:
+        cmd += ["--playlist-end", str(max_videos)]
+    # "--" : l'URL n'est jamais lue comme une option de yt-dlp
+    cmd += ["--", url]
+
+    log(f"   Commande: {' '.join(cmd[:3])}... {url}")
+    started = time.time()
+    items, hit_known, ok = _stream_flat(cmd, known_ids, log)
+    if metrics:
+        metrics.spawn("yt-dlp")
+
+    full_at = None
+    if hit_known:
+        log(f"   📇 {len(items)} nouvelle(s) vidéo(s) depuis le dernier listage")
+        seen = {item["id"] for item in items}
+        items += [item for item in cached["items"] if item["id"] not in seen]
+        complete = True
+        # Les vidéos supprimées depuis restent jusqu'au prochain listage complet
+        full_at = cached.get("full_at")
+    else:
+        # Listage complet : remplace la liste en cache (vidéos supprimées comprises)
+        complete = ok and max_videos == 0
+
+    if cache and ok and items:
+        cache.save(key, url, items, complete, full_at=full_at)
+
+    if max_videos > 0:
+        items = items[:max_videos]
+
+    if metadata:
+        metadata.record_many([(item["id"], None, item["duration"], None)
+                              for item in items if item.get("duration") is not None])
+
+    entries = [
+        VideoEntry(i, item["id"], f"{'NA' if single else f'{i:03d}'} - {item['name']}.{ext}")
+        for i, item in enumerate(items, start=1)
+    ]
+    log(f"   ✅ {len(entries)} fichier(s) détecté(s) en {time.time() - started:.1f}s")
+    return entries
@@ -0,0 +1,302 @@
+import csv
+import json
+import shlex
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import fields
+from pathlib import Path
+
+from cutlist import load_cut_list, parse_segments
+from engine import PAUSED, JobConfig
+
+# États d'un job de la file
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# PAUSED : même valeur que le résultat du moteur
+
+# Noms courts acceptés dans les fichiers de jobs
+ALIASES = {
+    "folder": "gdrive_folder",
+    "remote": "rclone_remote",
+    "audio": "audio_only",
+    "workers": "download_workers",
+    "max": "max_videos",
+    "staging": "staging_gb",
+    "manifest": "remote_manifest",
+    "rename": "remote_rename",
+    "rcd": "rclone_rcd",
+    "postprocess": "postprocess_workers",
+}
+
+_TRUE = {"1", "true", "yes", "oui", "on", "y", "o"}
+
+
+def guess_mode(url):
+    """Mode déduit de l'URL : playlist, chaîne ou vidéo"""
+    if "list=" in url:
+        return "playlist"
+    if "/@" in url or "/channel/" in url or "/c/" in url or "/user/" in url:
+        return "channel"
+    return "video"
+
+
+def job_options(options, base_dir=None):
+    """Convertit des options texte [(clé, valeur)] ("end" -> "30", "folder" -> ...) en champs de JobConfig.
+
+    "cut" peut être répété ; "cut_list" désigne un fichier de plages (relatif à base_dir).
+    """
+    types = {f.name: f.type for f in fields(JobConfig)}
+    result = {}
+    segments = []
+    for key, value in options:
+        key = key.strip().lower().replace("-", "_")
+        value = (value or "").strip()
+        if not key or not value:
+            continue
+        if key == "cut":
+            segments += parse_segments(value)
+            continue
+        if key == "cut_list":
+            path = Path(value)
+            segments += load_cut_list(path if path.is_absolute() or not base_dir else Path(base_dir) / path)
+            continue
+        key = ALIASES.get(key, key)
+        if key not in types or types[key] is list:
+            raise ValueError(f"Option inconnue: {key}")
+        if types[key] is bool:
+            result[key] = value.lower() in _TRUE
+        elif types[key] is int:
+            result[key] = int(value)
+        elif types[key] is float:
+            result[key] = float(value)
+        else:
+            result[key] = value
+    if segments:
+        result["segments"] = [list(s) for s in segments]
+    if result.get("rclone_remote"):
+        result.setdefault("gdrive_enabled", True)
+    return result
+
+
+def parse_job_file(path, defaults=None):
+    """Lit une liste de jobs ; retourne une liste de dicts (champs de JobConfig).
+
+    Texte : une URL par ligne suivie d'options "clé=valeur" (ex: mode=channel end=30
+    folder=JDR/AnimatedBattleMaps cut="0:10-0:20 Intro"). Une ligne sans URL juste après
+    une URL est le dossier rclone de ce job (format du fichier memo).
+    CSV : en-tête avec une colonne "url" et une colonne par option.
+    """
+    path = Path(path)
+    defaults = dict(defaults or {})
+    defaults.pop("url", None)
+    jobs = []
+
+    def add(url, options, where):
+        try:
+            job = dict(defaults)
+            job.update(job_options(options, base_dir=path.parent))
+        except ValueError as e:
+            raise ValueError(f"{path.name}, {where}: {e}")
+        job["url"] = url
+        if "mode" not in job:
+            job["mode"] = guess_mode(url)
+        jobs.append(job)
+
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+
+    if path.suffix.lower() == ".csv":
+        for i, row in enumerate(csv.DictReader(content.splitlines()), start=2):
+            row = {(k or "").strip().lower(): v for k, v in row.items()}
+            url = (row.pop("url", "") or "").strip()
+            if url and not url.startswith("#"):
+                add(url, row.items(), f"ligne {i}")
+        return jobs
+
+    expect_folder = False
+    for i, line in enumerate(content.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            parts = shlex.split(line)
+        except ValueError as e:
+            raise ValueError(f"{path.name}, ligne {i}: {e}")
+        if "://" not in parts[0]:
+            if expect_folder and len(parts) == 1 and "=" not in parts[0]:
+                jobs[-1]["gdrive_folder"] = parts[0]
+                expect_folder = False
+                continue
+            raise ValueError(f"{path.name}, ligne {i}: URL attendue")
+        options = []
+        for part in parts[1:]:
+            key, sep, value = part.partition("=")
+            if not sep:
+                raise ValueError(f"{path.name}, ligne {i}: option invalide {part!r} (attendu: clé=valeur)")
+            options.append((key, value))
+        add(parts[0], options, f"ligne {i}")
+        expect_folder = all(ALIASES.get(key, key) != "gdrive_folder" for key, _ in options)
+    return jobs
+
+
+class JobQueue:
+    """File de jobs persistante (JSON) : survit à un redémarrage, les jobs interrompus repartent"""
+
+    def __init__(self, path, log=print):
+        self.path = Path(path)
+        self.log = log
+        self.items = []  # {"id", "job", "status", "added_at", "updated_at", "error"}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.items = json.load(f)
+        except FileNotFoundError:
+            self.items = []
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ File de jobs illisible ({self.path.name}): {e}")
+            self.items = []
+        # Jobs interrompus par un arrêt brutal : à relancer (le journal du job reprend où il en était)
+        for item in self.items:
+            if item["status"] == RUNNING:
+                item["status"] = PENDING
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.items, f, indent=2, ensure_ascii=False)
+            tmp.replace(self.path)
+        except OSError as e:
+            self.log(f"⚠️ Erreur de sauvegarde de la file de jobs: {e}")
+
+    def add(self, job):
+        """Ajoute un job (dict de JobConfig) ; retourne son identifiant"""
+        now = time.time()
+        item = {"id": uuid.uuid4().hex[:8], "job": dict(job), "status": PENDING,
+                "added_at": now, "updated_at": now, "error": ""}
+        with self._lock:
+            self.items.append(item)
+            self._save()
+        return item["id"]
+
+    def get(self, item_id):
+        with self._lock:
+            return next((dict(item) for item in self.items if item["id"] == item_id), None)
+
+    def list(self):
+        with self._lock:
+            return [dict(item) for item in self.items]
+
+    def claim(self):
+        """Prend le prochain job en attente (passe en "running"), ou None"""
+        with self._lock:
+            for item in self.items:
+                if item["status"] == PENDING:
+                    item["status"] = RUNNING
+                    item["updated_at"] = time.time()
+                    self._save()
+                    return dict(item)
+        return None
+
+    def set_status(self, item_id, status, error=""):
+        with self._lock:
+            for item in self.items:
+                if item["id"] == item_id:
+                    item["status"] = status
+                    item["error"] = error
+                    item["updated_at"] = time.time()
+            self._save()
+
+    def remove(self, item_id):
+        with self._lock:
+            self.items = [item for item in self.items if item["id"] != item_id]
+            self._save()
+
+    def clear_finished(self):
+        """Retire les jobs terminés"""
+        with self._lock:
+            self.items = [item for item in self.items if item["status"] != DONE]
+            self._save()
+
+    def counts(self):
+        with self._lock:
+            counts = {}
+            for item in self.items:
+                counts[item["status"]] = counts.get(item["status"], 0) + 1
+            return counts
+
+
+class QueueRunner:
+    """Exécute les jobs de la file, plusieurs à la fois, avec des limites globales
+    de téléchargements (processus yt-dlp) et d'uploads (processus rclone)."""
+
+    def __init__(self, queue, make_engine, max_jobs=2, download_slots=3, upload_slots=4, log=print):
+        self.queue = queue
+        # make_engine(item, download_slots, upload_slots) -> moteur avec run(job), pause()
+        self.make_engine = make_engine
+        self.max_jobs = max(1, max_jobs)
+        self.download_slots = threading.BoundedSemaphore(max(1, download_slots))
+        self.upload_slots = threading.BoundedSemaphore(max(1, upload_slots))
+        self.log = log
+        self.stopped = False
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Exécute les jobs en attente jusqu'à épuisement de la file (ou stop()) ; retourne les compteurs"""
+        self.stopped = False
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as pool:
+            running = set()
+            while True:
+                while not self.stopped and len(running) < self.max_jobs:
+                    item = self.queue.claim()
+                    if not item:
+                        break
+                    running.add(pool.submit(self._run_item, item))
+                if not running:
+                    break
+                _, running = wait(running, return_when=FIRST_COMPLETED)
+        return self.queue.counts()
+
+    def stop(self):
+        """Met en pause les jobs en cours (ils repartiront au prochain lancement) et n'en lance plus"""
+        self.stopped = True
+        with self._lock:
+            engines = list(self._engines.values())
+        for engine in engines:
+            engine.pause()
+
+    def _run_item(self, item):
+        item_id = item["id"]
+        job = JobConfig.from_dict(item["job"])
+        self.log(f"▶ Job {item_id}: {job.url}")
+        engine = self.make_engine(item, self.download_slots, self.upload_slots)
+        with self._lock:
+            self._engines[item_id] = engine
+        try:
+            # stop() arrivé entre la prise du job et l'enregistrement du moteur
+            status = PAUSED if self.stopped else engine.run(job)
+        except Exception as e:
+            self.queue.set_status(item_id, FAILED, error=str(e))
+            self.log(f"❌ Job {item_id} en échec: {e}")
+            return
+        finally:
+            with self._lock:
+                self._engines.pop(item_id, None)
+            engine.close()
+
+        if status == PAUSED:
+            self.queue.set_status(item_id, PENDING)
+            self.log(f"⏸️ Job {item_id} en pause (reprendra au prochain lancement)")
+        else:
+            self.queue.set_status(item_id, DONE)
+            self.log(f"✅ Job {item_id} terminé")
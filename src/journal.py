@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+from enumerator import VideoEntry
+
+# États successifs d'une vidéo dans un job
+STATES = ("enumerated", "downloading", "cut", "uploaded", "deleted")
+# États terminaux hors de cette suite : erreur définitive, vidéo écartée (trop courte...)
+CLOSED = ("failed", "skipped")
+
+
+def job_id(**params):
+    """Identifiant stable d'un job à partir de ses paramètres"""
+    key = json.dumps(params, sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+class JobJournal:
+    """Journal JSONL (ajout seul) de l'état de chaque vidéo d'un job, pour la reprise"""
+
+    def __init__(self, jobs_dir, job_id, log=print):
+        self.dir = Path(jobs_dir)
+        self.job_id = job_id
+        self.path = self.dir / f"{job_id}.jsonl"
+        # Archive yt-dlp (--download-archive) associée au job
+        self.archive = self.dir / f"{job_id}.archive"
+        self.log = log
+        self.entries = {}  # video_id -> VideoEntry, dans l'ordre de la liste
+        self.states = {}  # video_id -> état
+        self.files = {}  # video_id -> fichiers locaux produits (un par plage découpée)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            line = "\n"
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Dernière ligne tronquée par un crash
+                    self._apply(record)
+            if not line.endswith("\n"):
+                # Terminer la ligne tronquée pour ne pas corrompre le prochain ajout
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write("\n")
+        except OSError as e:
+            self.log(f"⚠️ Journal illisible ({self.path.name}): {e}")
+
+    def _apply(self, record):
+        if record.get("type") == "entries":
+            self.entries = {item[1]: VideoEntry(*item) for item in record["items"]}
+        elif record.get("type") == "state":
+            self.states[record["id"]] = record["state"]
+            if record.get("file"):
+                files = self.files.setdefault(record["id"], [])
+                if Path(record["file"]) not in files:
+                    files.append(Path(record["file"]))
+
+    def _append(self, record):
+        record["t"] = time.time()
+        with self._lock:
+            self._apply(record)
+            try:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                self.log(f"⚠️ Erreur d'écriture du journal: {e}")
+
+    def record_entries(self, entries):
+        """Enregistre la liste des vidéos (évite de relister à la reprise)"""
+        self._append({"type": "entries", "items": [list(e) for e in entries]})
+
+    def set_state(self, video_id, state, file=None):
+        if self.states.get(video_id) == state and not file:
+            return
+        record = {"type": "state", "id": video_id, "state": state}
+        if file:
+            record["file"] = str(file)
+        self._append(record)
+
+    def is_done(self, video_id, final_state):
+        state = self.states.get(video_id, "enumerated")
+        return state not in CLOSED and STATES.index(state) >= STATES.index(final_state)
+
+    def is_closed(self, video_id):
+        """Vidéo abandonnée (erreur définitive) ou écartée : plus rien à faire"""
+        return self.states.get(video_id) in CLOSED
+
+    def pending(self, final_state):
+        """Vidéos encore à reprendre (ni à l'état final, ni abandonnées), dans l'ordre de la liste"""
+        return [e for vid, e in self.entries.items()
+                if not self.is_done(vid, final_state) and not self.is_closed(vid)]
+
+    def has_files(self, video_id):
+        """Au moins un des fichiers locaux produits pour la vidéo existe encore"""
+        return any(path.is_file() for path in self.files.get(video_id, []))
+
+    def reopen(self, video_ids):
+        """Vidéos à refaire (fichiers locaux disparus) : revenues à "enumerated" et retirées
+        de l'archive yt-dlp, qui sinon les sauterait"""
+        video_ids = set(video_ids)
+        if not video_ids:
+            return
+        for video_id in video_ids:
+            self._append({"type": "state", "id": video_id, "state": "enumerated"})
+        try:
+            lines = self.archive.read_text(encoding="utf-8").splitlines(keepends=True)
+            with self._lock:
+                self.archive.write_text(
+                    "".join(line for line in lines if not line.split() or line.split()[-1] not in video_ids),
+                    encoding="utf-8"
+                )
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.log(f"⚠️ Erreur de mise à jour de l'archive: {e}")
+
+    def local_files(self, final_state):
+        """Fichiers déjà découpés en local mais pas encore arrivés à l'état final"""
+        return [
+            path for vid in self.entries
+            if self.states.get(vid) == "cut" and not self.is_done(vid, final_state)
+            for path in self.files.get(vid, []) if path.is_file()
+        ]
@@ -0,0 +1,93 @@
+import re
+import tkinter as tk
+from collections import deque
+
+# Préfixes ajoutés aux lignes : "[003] " (téléchargement parallèle), "[1f3a9c0e] " (job de la file)
+PREFIX_RE = re.compile(r"^((?:\[[0-9a-f]{3,8}\] )*)")
+# Ligne de progression yt-dlp, éventuellement préfixée
+PROGRESS_RE = re.compile(PREFIX_RE.pattern + r"\[download\]\s+[\d.]+%")
+
+
+def progress_key(line):
+    """Clé de regroupement d'une ligne de progression, ou None pour une ligne normale"""
+    match = PROGRESS_RE.match(line)
+    if match:
+        return match.group(1)
+    return None
+
+
+class LogView:
+    """Affichage du log limité à `capacity` lignes (tampon circulaire).
+
+    Les lignes "[download] xx%" successives d'un même téléchargement sont fusionnées
+    en une seule ligne mise à jour. L'historique complet reste dans le fichier de log.
+    """
+
+    def __init__(self, text, capacity=2000):
+        self.text = text
+        self.capacity = capacity
+        self.lines = deque(maxlen=capacity)  # cellules [numéro, texte]
+        self._progress = {}  # clé -> cellule de la dernière ligne de progression
+        self._seq = 0
+        self._rendered = 0  # numéro de la dernière cellule affichée
+        self._widget_lines = 0
+
+    def _first_seq(self):
+        return self.lines[0][0] if self.lines else self._seq + 1
+
+    def write(self, new_lines):
+        """Ajoute un lot de lignes puis met à jour le widget"""
+        updated = set()  # cellules déjà affichées modifiées sur place
+        for line in new_lines:
+            key = progress_key(line)
+            if key is not None:
+                cell = self._progress.get(key)
+                if cell is not None and cell[0] >= self._first_seq():
+                    cell[1] = line
+                    if cell[0] <= self._rendered:
+                        updated.add(cell[0])
+                    continue
+            else:
+                # Une ligne normale termine la progression en cours pour ce préfixe
+                self._progress.pop(PREFIX_RE.match(line).group(1), None)
+            self._seq += 1
+            cell = [self._seq, line]
+            self.lines.append(cell)
+            if key is not None:
+                self._progress[key] = cell
+
+        if updated - {self._rendered}:
+            self._render_all()
+        else:
+            self._render_incremental(self._rendered in updated)
+        self.text.see(tk.END)
+
+    def _render_all(self):
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "".join(cell[1] + "\n" for cell in self.lines))
+        self._widget_lines = len(self.lines)
+        self._rendered = self._seq
+
+    def _render_incremental(self, last_updated):
+        if last_updated and self._widget_lines:
+            # Remplacer la dernière ligne affichée (progression mise à jour)
+            cell = next(c for c in reversed(self.lines) if c[0] == self._rendered)
+            self.text.delete("end-2l linestart", "end-1c")
+            self.text.insert(tk.END, cell[1] + "\n")
+
+        fresh = []
+        for cell in reversed(self.lines):
+            if cell[0] <= self._rendered:
+                break
+            fresh.append(cell)
+        fresh.reverse()
+        if fresh:
+            self.text.insert(tk.END, "".join(cell[1] + "\n" for cell in fresh))
+            self._widget_lines += len(fresh)
+            self._rendered = self._seq
+
+        # Supprimer les lignes les plus anciennes au-delà de la capacité
+        excess = self._widget_lines - len(self.lines)
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self._widget_lines -= excess
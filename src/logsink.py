@@ -0,0 +1,85 @@
+import atexit
+import queue
+import threading
+from pathlib import Path
+
+
+class LogWriter:
+    """Écriture du fichier de log en tâche de fond : file thread-safe, fichier bufferisé, rotation par taille"""
+
+    _STOP = object()
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3, flush_interval=0.5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=64 * 1024)
+        self._size = self.path.stat().st_size
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, line):
+        """Ajoute une ligne (sans retour à la ligne), n'attend jamais le disque"""
+        if not self._closed:
+            self.queue.put(line)
+
+    def close(self):
+        """Vide la file et ferme le fichier"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(self._STOP)
+        self._thread.join(timeout=5)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.stem}.{i}{self.path.suffix}")
+            if src.exists():
+                src.replace(self.path.with_name(f"{self.path.stem}.{i + 1}{self.path.suffix}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.stem}.1{self.path.suffix}"))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=64 * 1024)
+        self._size = 0
+
+    def _worker(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._file.flush()
+                continue
+
+            # Regrouper tout ce qui est déjà en attente en une seule écriture
+            batch = []
+            stop = False
+            while True:
+                if item is self._STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                data = "\n".join(batch) + "\n"
+                try:
+                    self._file.write(data)
+                    self._size += len(data.encode('utf-8'))
+                    if self._size >= self.max_bytes:
+                        self._rotate()
+                except Exception as e:
+                    print(f"Erreur écriture log: {e}")
+
+            if stop:
+                self._file.flush()
+                self._file.close()
+                return
@@ -0,0 +1,227 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Titre, durée, date et formats d'une vidéo : gardés une semaine
+METADATA_TTL = 7 * 24 * 3600
+# Infos complètes de l'extracteur (liens des formats) : jusqu'à l'expiration des liens,
+# ou ce délai si les liens n'en indiquent pas
+INFO_TTL = 4 * 3600
+# Marge avant l'expiration des liens (un téléchargement doit avoir le temps de finir)
+INFO_MARGIN = 30 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT,
+    duration REAL,
+    upload_date TEXT,
+    formats TEXT,
+    updated_at REAL NOT NULL,
+    info BLOB,
+    info_expires_at REAL
+)
+"""
+
+
+def too_short(duration, segments):
+    """La vidéo se termine avant le début de toutes les plages demandées"""
+    return duration is not None and all(s.start >= duration for s in segments)
+
+
+def format_summary(formats):
+    """Formats disponibles, sans les liens (qui expirent)"""
+    keys = ("format_id", "ext", "height", "fps", "vcodec", "acodec", "tbr", "filesize", "filesize_approx")
+    return [{k: f[k] for k in keys if f.get(k) is not None} for f in formats or []]
+
+
+def links_expire_at(formats, fetched_at):
+    """Expiration la plus proche des liens des formats (paramètre expire= des URL YouTube)"""
+    expires = []
+    for f in formats or []:
+        value = parse_qs(urlparse(f.get("url") or "").query).get("expire")
+        if value and value[0].isdigit():
+            expires.append(int(value[0]))
+    return min(expires) if expires else fetched_at + INFO_TTL
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MetadataCache:
+    """Infos yt-dlp de chaque vidéo (titre, durée, date, formats) gardées en SQLite entre les exécutions.
+
+    Le listage rapide y note la durée ; chaque téléchargement y dépose les infos
+    complètes de l'extracteur (--write-info-json), réutilisées par le téléchargement suivant
+    de la même vidéo (--load-info-json, quelle que soit la résolution ou la plage) tant que
+    les liens des formats sont valides. Partagé par les jobs et les processus.
+    """
+
+    def __init__(self, path, ttl=METADATA_TTL, log=print):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.log = log
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Une connexion partagée par les threads du processus (accès sérialisés par le verrou)
+        self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(SCHEMA)
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        self._db.execute("DELETE FROM videos WHERE updated_at < ?", (now - self.ttl,))
+        self._db.execute("UPDATE videos SET info = NULL, info_expires_at = NULL WHERE info_expires_at < ?", (now,))
+
+    def record(self, video_id, title=None, duration=None, upload_date=None):
+        self.record_many([(video_id, title, duration, upload_date)])
+
+    def record_many(self, rows):
+        """Infos partielles (listage) : [(id, titre, durée, date)] en une transaction ;
+        les valeurs inconnues (None) ne remplacent pas celles déjà connues"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO videos (video_id, title, duration, upload_date, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET "
+                "title = COALESCE(excluded.title, title), duration = COALESCE(excluded.duration, duration), "
+                "upload_date = COALESCE(excluded.upload_date, upload_date), updated_at = excluded.updated_at",
+                [(vid, title, _number(duration), date, now) for vid, title, duration, date in rows]
+            )
+
+    def get(self, video_id):
+        """{"title", "duration", "upload_date", "formats"} d'une vidéo, ou None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT title, duration, upload_date, formats FROM videos WHERE video_id = ? AND updated_at >= ?",
+                (video_id, time.time() - self.ttl)
+            ).fetchone()
+        if not row:
+            return None
+        title, duration, upload_date, formats = row
+        return {"title": title, "duration": duration, "upload_date": upload_date,
+                "formats": json.loads(formats) if formats else []}
+
+    def duration(self, video_id):
+        meta = self.get(video_id)
+        return meta["duration"] if meta else None
+
+    def ingest(self, info_file):
+        """Enregistre un fichier .info.json écrit par yt-dlp puis le supprime ; retourne l'ID ou None"""
+        info_file = Path(info_file)
+        try:
+            text = info_file.read_text(encoding="utf-8")
+            info = json.loads(text)
+        except (OSError, ValueError):
+            return None  # absent, ou en cours d'écriture par un autre yt-dlp
+        video_id = info.get("id")
+        if video_id and info.get("_type", "video") == "video":
+            now = time.time()
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (video_id, info.get("title"), _number(info.get("duration")), info.get("upload_date"),
+                     json.dumps(format_summary(info.get("formats"))), now,
+                     zlib.compress(text.encode("utf-8")), links_expire_at(info.get("formats"), now))
+                )
+        info_file.unlink(missing_ok=True)
+        return video_id
+
+    def ingest_dir(self, folder):
+        """Enregistre tous les .info.json d'un dossier ; retourne le nombre de vidéos"""
+        return sum(1 for f in Path(folder).glob("*.info.json") if self.ingest(f))
+
+    def has_info(self, video_id):
+        """Infos complètes réutilisables (liens encore valides assez longtemps)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM videos WHERE video_id = ? AND info IS NOT NULL AND info_expires_at > ?",
+                (video_id, time.time() + INFO_MARGIN)
+            ).fetchone()
+        return row is not None
+
+    def info_file(self, video_id, folder):
+        """Écrit les infos complètes en cache pour --load-info-json ; retourne le fichier ou None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT info FROM videos WHERE video_id = ? AND info IS NOT NULL AND info_expires_at > ?",
+                (video_id, time.time() + INFO_MARGIN)
+            ).fetchone()
+        if not row:
+            return None
+        path = Path(folder) / f"{video_id}.cached.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(zlib.decompress(row[0]))
+        except (OSError, zlib.error) as e:
+            self.log(f"⚠️ Infos en cache illisibles ({video_id}): {e}")
+            return None
+        return path
+
+    def forget_info(self, video_id):
+        """Infos complètes refusées par yt-dlp (liens expirés...) : la prochaine fois, nouvelle extraction"""
+        with self._lock, self._db:
+            self._db.execute("UPDATE videos SET info = NULL, info_expires_at = NULL WHERE video_id = ?", (video_id,))
+
+
+class InfoReuse:
+    """Infos en cache d'une exécution : proposées une fois par vidéo, un essai refusé
+    (liens expirés, autre adresse IP...) repasse par une extraction complète."""
+
+    def __init__(self, metadata, folder, metrics=None):
+        self.metadata = metadata
+        self.folder = Path(folder)
+        self.metrics = metrics
+        self.tried = set()
+        self._lock = threading.Lock()
+
+    def write_args(self):
+        """Options yt-dlp qui déposent les infos de chaque vidéo dans le dossier de passage"""
+        return ["--write-info-json", "--no-write-playlist-metafiles", "-o", f"infojson:{self.folder / '%(id)s'}"]
+
+    def available(self, video_id):
+        return video_id not in self.tried and self.metadata.has_info(video_id)
+
+    def args(self, video_id):
+        """Arguments yt-dlp à la place de l'URL (--load-info-json), ou None pour une extraction"""
+        with self._lock:
+            retry = video_id in self.tried
+            self.tried.add(video_id)
+        if retry:
+            self.metadata.forget_info(video_id)
+            return None
+        path = self.metadata.info_file(video_id, self.folder)
+        if not path:
+            return None
+        if self.metrics:
+            self.metrics.add("info_cache_hits")
+        return ["--load-info-json", str(path)]
+
+    def collect(self, video_id=None):
+        """Enregistre les infos déposées par yt-dlp (une vidéo, ou tout le dossier)"""
+        if video_id:
+            (self.folder / f"{video_id}.cached.json").unlink(missing_ok=True)
+            return 1 if self.metadata.ingest(self.folder / f"{video_id}.info.json") else 0
+        return self.metadata.ingest_dir(self.folder)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_metadata_cache(path, **kwargs):
+    """Retourne le cache de métadonnées partagé pour un fichier SQLite donné"""
+    key = str(Path(path))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = MetadataCache(path, **kwargs)
+        return _caches[key]
@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+# Préfixe des métriques au format texte Prometheus
+PROMETHEUS_PREFIX = "ytcutter"
+
+
+class Metrics:
+    """Mesures d'une exécution : durée de chaque étape, octets, files d'attente, processus lancés.
+
+    Partagé entre les threads du moteur (téléchargements, uploads) ; summary() donne un dict
+    sérialisable en JSON, prometheus() le même contenu au format texte Prometheus.
+    """
+
+    def __init__(self, job_id=""):
+        self.job_id = job_id
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stages = {}  # étape -> {"count", "total", "max"}
+        self.counters = defaultdict(int)  # octets, vidéos, fichiers...
+        self.spawns = defaultdict(int)  # outil -> processus lancés
+        self.gauges = {}  # file -> {"value", "max"}
+        self._on_finish = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - started)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            s = self.stages.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+            s["count"] += 1
+            s["total"] += seconds
+            s["max"] = max(s["max"], seconds)
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def set(self, name, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def spawn(self, tool, count=1):
+        with self._lock:
+            self.spawns[tool] += count
+
+    def gauge(self, name, value):
+        """Profondeur courante d'une file (le maximum atteint est conservé)"""
+        with self._lock:
+            g = self.gauges.setdefault(name, {"value": 0, "max": 0})
+            g["value"] = value
+            g["max"] = max(g["max"], value)
+
+    def on_finish(self, callback):
+        """callback(metrics) appelé par finish() (ex: relevé de compteurs partagés)"""
+        self._on_finish.append(callback)
+
+    def finish(self):
+        for callback in self._on_finish:
+            callback(self)
+        self._on_finish = []
+        self.finished_at = time.time()
+
+    @property
+    def wall_time(self):
+        end = self.finished_at or time.time()
+        return end - self.started_at
+
+    def summary(self):
+        with self._lock:
+            wall = self.wall_time
+            stages = {
+                name: dict(s, average=s["total"] / s["count"] if s["count"] else 0.0)
+                for name, s in self.stages.items()
+            }
+            counters = dict(self.counters)
+            throughput = {
+                name[len("bytes_"):]: value / wall
+                for name, value in counters.items() if name.startswith("bytes_") and wall > 0
+            }
+            return {
+                "job_id": self.job_id,
+                "started_at": self.started_at,
+                "wall_time": wall,
+                "stages": stages,
+                "counters": counters,
+                "throughput": throughput,  # octets/s sur la durée totale
+                "spawns": dict(self.spawns),
+                "queues": {name: dict(g) for name, g in self.gauges.items()},
+            }
+
+    def write_summary(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def prometheus(self):
+        return prometheus_text([self.summary()])
+
+    def write_prometheus(self, path):
+        write_text_atomic(path, self.prometheus())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items() if v != "")
+    return "{" + inner + "}" if inner else ""
+
+
+def prometheus_text(summaries):
+    """Résumés (Metrics.summary()) -> format texte Prometheus, un jeu de séries par job"""
+    p = PROMETHEUS_PREFIX
+    series = defaultdict(list)  # nom -> lignes
+    types = {}
+
+    def put(name, metric_type, value, **labels):
+        types[name] = metric_type
+        series[name].append(f"{p}_{name}{_labels(**labels)} {value:g}")
+
+    for s in summaries:
+        job = s.get("job_id", "")
+        put("run_wall_seconds", "gauge", s["wall_time"], job=job)
+        for stage, st in s["stages"].items():
+            put("stage_seconds_total", "counter", st["total"], job=job, stage=stage)
+            put("stage_runs_total", "counter", st["count"], job=job, stage=stage)
+            put("stage_seconds_max", "gauge", st["max"], job=job, stage=stage)
+        for name, value in s["counters"].items():
+            if name.startswith("bytes_"):
+                put("bytes_total", "counter", value, job=job, kind=name[len("bytes_"):])
+            else:
+                put(f"{name}_total", "counter", value, job=job)
+        for tool, count in s["spawns"].items():
+            put("subprocess_spawns_total", "counter", count, job=job, tool=tool)
+        for queue, g in s["queues"].items():
+            put("queue_depth", "gauge", g["value"], job=job, queue=queue)
+            put("queue_depth_max", "gauge", g["max"], job=job, queue=queue)
+
+    lines = []
+    for name, rows in series.items():
+        lines.append(f"# TYPE {p}_{name} {types[name]}")
+        lines += rows
+    return "\n".join(lines) + "\n"
+
+
+def write_text_atomic(path, text):
+    """Écrit le fichier d'un coup (lecture par le collecteur textfile de node_exporter)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    tmp.replace(path)
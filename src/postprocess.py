@@ -0,0 +1,96 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from metrics import Metrics
+
+# Même qualité que `yt-dlp -x --audio-format mp3` (VBR ~190 kb/s)
+MP3_ARGS = ["-vn", "-c:a", "libmp3lame", "-q:a", "2"]
+# Changement de conteneur sans ré-encodage
+REMUX_ARGS = ["-c", "copy", "-movflags", "+faststart"]
+
+
+def default_workers():
+    """Une conversion ffmpeg par cœur"""
+    return max(1, os.cpu_count() or 1)
+
+
+def convert_command(ffmpeg, source, dest, audio_only=False):
+    """Commande ffmpeg de conversion d'une plage brute (MP3 ou remux)"""
+    return ([str(ffmpeg), "-hide_banner", "-loglevel", "error", "-y", "-i", str(source)]
+            + (MP3_ARGS if audio_only else REMUX_ARGS) + [str(dest)])
+
+
+class PostProcessor:
+    """Conversions ffmpeg (MP3, remux) découplées des téléchargements.
+
+    yt-dlp produit les plages brutes (m4a, webm, mkv...) ; chacune est convertie par un
+    processus ffmpeg, autant en parallèle que de workers, pendant que les téléchargements
+    continuent. on_done(fichier, *contexte) est appelé à la fin de chaque conversion avec
+    le fichier final (la plage brute si la conversion a échoué).
+    """
+
+    def __init__(self, ffmpeg, audio_only=False, workers=0, on_done=None, metrics=None, log=print):
+        self.ffmpeg = ffmpeg
+        self.audio_only = audio_only
+        self.ext = "mp3" if audio_only else "mp4"
+        self.workers = workers or default_workers()
+        self.on_done = on_done or (lambda file_path, *context: None)
+        self.metrics = metrics or Metrics()
+        self.log = log
+        # File non bornée : la sortie de yt-dlp (et donc le journal) n'attend jamais ffmpeg
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="postprocess")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def needs(self, file_path):
+        """La plage doit-elle passer par ffmpeg (extension différente du format final) ?"""
+        return Path(file_path).suffix.lower() != "." + self.ext
+
+    def submit(self, file_path, *context):
+        with self._lock:
+            self._pending += 1
+            self.metrics.gauge("postprocess_queue", self._pending)
+        self.pool.submit(self._run, Path(file_path), context)
+
+    def _run(self, file_path, context):
+        try:
+            result = self.convert(file_path)
+            self.on_done(result, *context)
+        except Exception as e:
+            self.log(f"❌ Erreur de conversion ({file_path.name}): {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.metrics.gauge("postprocess_queue", self._pending)
+
+    def convert(self, file_path):
+        """Convertit une plage brute ; retourne le fichier final"""
+        dest = file_path.with_suffix("." + self.ext)
+        tmp = dest.with_name(f"{dest.stem}.part{dest.suffix}")
+        with self.metrics.timer("postprocess"):
+            self.metrics.spawn("ffmpeg")
+            try:
+                result = subprocess.run(
+                    convert_command(self.ffmpeg, file_path, tmp, audio_only=self.audio_only),
+                    capture_output=True,
+                    text=True
+                )
+                ok = result.returncode == 0 and tmp.is_file()
+                error = result.stderr.strip()[:200] or f"code {result.returncode}"
+            except OSError as e:
+                ok, error = False, str(e)
+        if not ok:
+            tmp.unlink(missing_ok=True)
+            self.metrics.add("postprocess_failed")
+            self.log(f"⚠️ Conversion impossible, fichier gardé tel quel ({file_path.name}): {error}")
+            return file_path
+        tmp.replace(dest)
+        file_path.unlink(missing_ok=True)
+        return dest
+
+    def close(self):
+        """Attend la fin des conversions en cours et en attente"""
+        self.pool.shutdown(wait=True)
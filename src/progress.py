@@ -0,0 +1,162 @@
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Préfixe des lignes de progression structurées émises par yt-dlp
+PROGRESS_MARKER = "[progression] "
+
+# Une ligne JSON par mise à jour, avec l'ID de la vidéo concernée
+PROGRESS_ARGS = [
+    "--progress-template",
+    "download:" + PROGRESS_MARKER
+    + "%(info.id)s %(progress.{status,downloaded_bytes,total_bytes,total_bytes_estimate,speed,eta,elapsed,_percent})j",
+    # Pas plus de 4 mises à jour par seconde et par yt-dlp
+    "--progress-delta", "0.25",
+]
+
+_PROGRESS_RE = re.compile(r"^\[progression\] (\S+) (\{.*\})\s*$")
+
+
+@dataclass
+class ProgressEvent:
+    """Mise à jour de progression d'une vidéo"""
+    video_id: str
+    status: str
+    downloaded: int = 0
+    total: Optional[int] = None
+    speed: Optional[float] = None
+    eta: Optional[float] = None
+    percent: float = 0.0
+
+
+def parse_progress_event(line):
+    """Décode une ligne "[progression] <id> {json}", ou None pour une autre ligne"""
+    match = _PROGRESS_RE.match(line)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(2))
+    except ValueError:
+        return None
+    total = data.get("total_bytes") or data.get("total_bytes_estimate")
+    downloaded = data.get("downloaded_bytes") or 0
+    percent = data.get("_percent")
+    if percent is None:
+        percent = 100.0 * downloaded / total if total else 0.0
+    if data.get("status") == "finished":
+        percent = 100.0
+    return ProgressEvent(
+        video_id=match.group(1),
+        status=data.get("status", "downloading"),
+        downloaded=int(downloaded),
+        total=int(total) if total else None,
+        speed=data.get("speed"),
+        eta=data.get("eta"),
+        percent=min(100.0, float(percent)),
+    )
+
+
+def format_bytes(value):
+    for unit in ("o", "Ko", "Mo", "Go"):
+        if value < 1024 or unit == "Go":
+            return f"{value:.1f} {unit}" if unit != "o" else f"{value:.0f} o"
+        value /= 1024
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+def format_stats(stats):
+    """Résumé court des statistiques de ProgressTracker.stats()"""
+    count = f"{stats['done']}/{stats['total']} vidéos — " if stats["total"] else ""
+    staging = f" — disque {stats['staging']}" if stats.get("staging") else ""
+    return f"{count}{format_bytes(stats['speed'])}/s — ETA {format_eta(stats['eta'])}{staging}"
+
+
+class ProgressTracker:
+    """Agrège la progression de toutes les vidéos : pourcentage global, débit, ETA.
+
+    update() retourne True quand l'interface doit être rafraîchie (au plus `max_rate` fois par seconde).
+    """
+
+    def __init__(self, total_videos=0, max_rate=10.0):
+        self.total_videos = total_videos
+        self.min_interval = 1.0 / max_rate
+        self.videos = {}  # video_id -> dernier ProgressEvent
+        self.finished = set()
+        self.received = 0  # octets reçus au total (toutes plages et nouveaux essais compris)
+        self.started_at = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, event):
+        with self._lock:
+            previous = self.videos.get(event.video_id)
+            before = previous.downloaded if previous else 0
+            # Nouvelle plage ou nouvel essai : le compteur de la vidéo repart de zéro
+            self.received += event.downloaded - before if event.downloaded >= before else event.downloaded
+            self.videos[event.video_id] = event
+            if event.status == "finished":
+                self.finished.add(event.video_id)
+            return self._should_emit(force=event.status == "finished")
+
+    def finish(self, video_id):
+        """Marque une vidéo comme terminée (fichier final produit ou échec)"""
+        with self._lock:
+            self.finished.add(video_id)
+            previous = self.videos.get(video_id)
+            self.videos[video_id] = ProgressEvent(
+                video_id, "finished", downloaded=previous.downloaded if previous else 0, percent=100.0
+            )
+            return self._should_emit(force=True)
+
+    def _should_emit(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_emit >= self.min_interval:
+            self._last_emit = now
+            return True
+        return False
+
+    def percent(self):
+        """Pourcentage global : moyenne sur toutes les vidéos attendues"""
+        with self._lock:
+            count = max(self.total_videos, len(self.videos))
+            if not count:
+                return 0.0
+            if not self.total_videos:
+                # Nombre de vidéos inconnu : progression de la vidéo en cours
+                current = [e for vid, e in self.videos.items() if vid not in self.finished]
+                return current[-1].percent if current else 100.0
+            return sum(e.percent for e in self.videos.values()) / count
+
+    def stats(self):
+        """Débit instantané, octets téléchargés, ETA globale et compteurs"""
+        percent = self.percent()
+        with self._lock:
+            active = [e for vid, e in self.videos.items() if vid not in self.finished]
+            speed = sum(e.speed or 0 for e in active)
+            downloaded = sum(e.downloaded for e in self.videos.values())
+            elapsed = time.monotonic() - self.started_at
+            if self.total_videos and percent > 0:
+                # Extrapolation linéaire sur l'avancement global
+                eta = elapsed * (100.0 - percent) / percent
+            else:
+                eta = max((e.eta for e in active if e.eta is not None), default=None)
+            return {
+                "percent": percent,
+                "speed": speed,
+                "average_speed": downloaded / elapsed if elapsed > 0 else 0.0,
+                "downloaded": downloaded,
+                "eta": eta,
+                "active": len(active),
+                "done": len(self.finished),
+                "total": self.total_videos,
+            }
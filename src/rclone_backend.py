@@ -0,0 +1,292 @@
+import atexit
+import base64
+import json
+import os
+import secrets
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Délai max de démarrage de `rclone rcd` (config lue, API prête)
+RCD_START_TIMEOUT = 15
+# Délai max d'un appel à l'API (copie d'un gros fichier comprise)
+RCD_CALL_TIMEOUT = 6 * 3600
+
+
+def split_remote(path):
+    """"gdrive:JDR/Cartes" -> ("gdrive:", "JDR/Cartes")"""
+    fs, _, remote = path.partition(":")
+    return f"{fs}:", remote.strip("/")
+
+
+def join_remote(remote, name):
+    return f"{remote}/{name}" if remote else name
+
+
+def _result(args, returncode=0, stdout="", stderr=""):
+    """Résultat au format de subprocess.run (mêmes contrôles pour les deux backends)"""
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+
+class RcError(Exception):
+    """Échec d'un appel à l'API rc (status : code HTTP, 0 si rcd injoignable)"""
+
+    def __init__(self, message, status=0):
+        super().__init__(message)
+        self.status = status
+
+
+class RcloneCli:
+    """Un processus rclone par opération (comportement historique, repli sans rcd)"""
+
+    # Chaque appel lance un processus (mesures : processus lancés)
+    spawns = True
+
+    def run(self, args, input=None):
+        return subprocess.run(["rclone"] + args, input=input, capture_output=True, text=True)
+
+    def lsjson(self, root, recursive=False):
+        args = ["lsjson", "--files-only", "--no-mimetype", root]
+        return self.run(args + (["-R"] if recursive else ["--max-depth", "1"]))
+
+    def lsjson_files(self, root, names):
+        """Quelques fichiers seulement (recherche directe, sans lister le dossier)"""
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as tmp:
+            tmp.write("\n".join(names) + "\n")
+            list_file = Path(tmp.name)
+        try:
+            return self.run(["lsjson", "--files-only", "--no-mimetype", "--files-from-raw", str(list_file), root])
+        finally:
+            list_file.unlink(missing_ok=True)
+
+    def copy_file(self, path, dest):
+        return self.run(["copy", str(path), dest])
+
+    def copy_files(self, src_dir, names, dest, transfers=4):
+        """Copie groupée : un seul rclone copy --files-from-raw pour tout le dossier"""
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as tmp:
+            tmp.write("\n".join(names) + "\n")
+            list_file = Path(tmp.name)
+        try:
+            return self.run([
+                "copy", str(src_dir), dest,
+                "--files-from-raw", str(list_file),
+                "--no-traverse",
+                "--transfers", str(transfers),
+                "--checkers", str(transfers * 2),
+            ])
+        finally:
+            list_file.unlink(missing_ok=True)
+
+    def moveto(self, src, dst):
+        return self.run(["moveto", src, dst])
+
+    def cat(self, path):
+        return self.run(["cat", path])
+
+    def rcat(self, path, data):
+        return self.run(["rcat", path], input=data)
+
+
+class RcloneDaemon:
+    """Session `rclone rcd` : un seul processus pour toute la session, appels par son API HTTP locale.
+
+    Connexions HTTPS et jetons OAuth restent chauds entre les listings, copies et renommages.
+    Les résultats ont la forme de subprocess.run (code, sortie, erreurs) : les appelants
+    traitent les erreurs comme avec le CLI.
+    """
+
+    spawns = False
+
+    def __init__(self, log=print):
+        self.log = log
+        self.process = None
+        self.url = ""
+        self.calls = 0
+        self._auth = ""
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout=RCD_START_TIMEOUT):
+        """Lance rclone rcd sur un port local libre ; False si l'API ne répond pas à temps"""
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        user, password = "ytcutter", secrets.token_urlsafe(16)
+        self._auth = "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+        self.url = f"http://127.0.0.1:{port}/"
+        try:
+            self.process = subprocess.Popen(
+                ["rclone", "rcd", "--rc-addr", f"127.0.0.1:{port}"],
+                # Identifiants par l'environnement : en argument, ils seraient visibles de tous (ps)
+                env=dict(os.environ, RCLONE_RC_USER=user, RCLONE_RC_PASS=password),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self.log(f"⚠️ rclone rcd impossible à lancer: {e}")
+            return False
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive:
+                self.log(f"⚠️ rclone rcd s'est arrêté au démarrage (code {self.process.returncode})")
+                return False
+            try:
+                self.call("rc/noop", timeout=2)
+                return True
+            except RcError:
+                time.sleep(0.1)
+        self.log("⚠️ rclone rcd ne répond pas")
+        self.close()
+        return False
+
+    def call(self, command, timeout=RCD_CALL_TIMEOUT, **params):
+        """Appel de l'API rc ; lève RcError (message rclone) en cas d'échec"""
+        request = urllib.request.Request(
+            self.url + command,
+            data=json.dumps(params).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": self._auth}
+        )
+        with self._lock:
+            self.calls += 1
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                error = json.load(e).get("error") or str(e)
+            except ValueError:
+                error = str(e)
+            raise RcError(error, e.code)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise RcError(str(e))
+
+    def _run(self, command, **params):
+        """Appel rc -> résultat façon subprocess.run ("ERROR : ..." comme le CLI)"""
+        try:
+            return _result(command, stdout=json.dumps(self.call(command, **params)))
+        except RcError as e:
+            # 404 : dossier ou fichier introuvable (code 3 du CLI)
+            return _result(command, 3 if e.status == 404 else 1, stderr=f"ERROR : {e}\n")
+
+    def lsjson(self, root, recursive=False):
+        fs, remote = split_remote(root)
+        result = self._run("operations/list", fs=fs, remote=remote,
+                           opt={"recurse": recursive, "filesOnly": True, "noMimeType": True})
+        if result.returncode == 0:
+            result.stdout = json.dumps(json.loads(result.stdout).get("list", []))
+        return result
+
+    def lsjson_files(self, root, names):
+        """Quelques fichiers seulement : un operations/stat par fichier (absent : ignoré)"""
+        fs, remote = split_remote(root)
+
+        def stat(name):
+            result = self._run("operations/stat", fs=fs, remote=join_remote(remote, name),
+                               opt={"noMimeType": True})
+            if result.returncode != 0:
+                return result, None
+            item = json.loads(result.stdout).get("item")
+            return result, item and dict(item, Path=name)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(stat, names))
+        failed = [r for r, _ in results if r.returncode != 0]
+        if failed:
+            return _result("operations/stat", 1, stderr="".join(r.stderr for r in failed))
+        return _result("operations/stat", stdout=json.dumps([item for _, item in results if item]))
+
+    def copy_file(self, path, dest):
+        path = Path(path)
+        fs, remote = split_remote(dest)
+        return self._run("operations/copyfile", srcFs=str(path.parent), srcRemote=path.name,
+                         dstFs=fs, dstRemote=join_remote(remote, path.name))
+
+    def copy_files(self, src_dir, names, dest, transfers=4):
+        """Copie groupée : `transfers` copies en parallèle dans la même session"""
+        with ThreadPoolExecutor(max_workers=max(1, transfers)) as pool:
+            results = list(pool.map(lambda name: self.copy_file(Path(src_dir) / name, dest), names))
+        failed = [r for r in results if r.returncode != 0]
+        return _result("operations/copyfile", 1 if failed else 0, stderr="".join(r.stderr for r in failed))
+
+    def moveto(self, src, dst):
+        src_fs, src_remote = split_remote(src)
+        dst_fs, dst_remote = split_remote(dst)
+        return self._run("operations/movefile", srcFs=src_fs, srcRemote=src_remote,
+                         dstFs=dst_fs, dstRemote=dst_remote)
+
+    def cat(self, path):
+        """Contenu d'un petit fichier distant (copié dans un dossier temporaire)"""
+        fs, remote = split_remote(path)
+        with tempfile.TemporaryDirectory() as tmp:
+            result = self._run("operations/copyfile", srcFs=fs, srcRemote=remote,
+                               dstFs=tmp, dstRemote="content")
+            if result.returncode == 0:
+                result.stdout = (Path(tmp) / "content").read_text(encoding="utf-8")
+        return result
+
+    def rcat(self, path, data):
+        fs, remote = split_remote(path)
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "content").write_text(data, encoding="utf-8")
+            return self._run("operations/copyfile", srcFs=tmp, srcRemote="content",
+                             dstFs=fs, dstRemote=remote)
+
+    def close(self):
+        if not self.alive:
+            return
+        try:
+            self.call("core/quit", timeout=5)
+            self.process.wait(timeout=5)
+        except (RcError, subprocess.TimeoutExpired):
+            self.process.terminate()
+
+
+_cli = RcloneCli()
+_session = None
+_session_lock = threading.Lock()
+
+
+def start_session(log=print):
+    """Démarre la session rcd partagée par le processus ; False = repli sur le CLI"""
+    global _session
+    with _session_lock:
+        if _session and _session.alive:
+            return True
+        daemon = RcloneDaemon(log=log)
+        if not daemon.start():
+            return False
+        _session = daemon
+        atexit.register(daemon.close)
+        return True
+
+
+def get_backend():
+    """Session rcd si elle tourne, sinon un processus rclone par opération"""
+    global _session
+    session = _session
+    if session and not session.alive:
+        with _session_lock:
+            if _session is session:
+                session.log("⚠️ Session rclone rcd arrêtée, retour à un processus rclone par opération")
+                _session = None
+        return _cli
+    return session or _cli
+
+
+def count_call(metrics, count=1):
+    """Processus rclone lancés, ou appels à la session rcd"""
+    if get_backend().spawns:
+        metrics.spawn("rclone", count)
+    else:
+        metrics.add("rclone_rc_calls", count)
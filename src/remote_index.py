@@ -0,0 +1,194 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+from rclone_backend import get_backend
+
+
+class RemoteIndex:
+    """Index en mémoire du contenu d'un dossier rclone (un seul listing par session)"""
+
+    def __init__(self, remote, remote_path, cache_dir=None, ttl=3600, recursive=False, log=print):
+        self.remote = remote
+        self.remote_path = remote_path.strip("/")
+        self.ttl = ttl
+        self.recursive = recursive
+        self.log = log
+        self.files = {}  # nom relatif -> {"size": int, "modtime": str}
+        self.loaded_at = 0
+        self.listings = 0
+        self.listing_seconds = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        self.cache_file = None
+        if cache_dir:
+            key = hashlib.sha1(f"{self.root}|{recursive}".encode("utf-8")).hexdigest()[:16]
+            self.cache_file = Path(cache_dir) / f"remote_{key}.json"
+
+    @property
+    def root(self):
+        return f"{self.remote}:{self.remote_path}" if self.remote_path else f"{self.remote}:"
+
+    def _load_cache(self):
+        """Recharge l'index depuis le disque s'il est encore valide"""
+        if not self.cache_file or not self.cache_file.exists():
+            return False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if time.time() - data.get("loaded_at", 0) > self.ttl:
+                return False
+            self.files = data.get("files", {})
+            self.loaded_at = data["loaded_at"]
+            return True
+        except Exception as e:
+            self.log(f"⚠️ Cache du listing Drive illisible: {e}")
+            return False
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"root": self.root, "loaded_at": self.loaded_at, "files": self.files}, f)
+            tmp.replace(self.cache_file)
+        except Exception as e:
+            self.log(f"⚠️ Erreur lors de la sauvegarde du cache Drive: {e}")
+
+    def refresh(self):
+        """Liste le remote une seule fois (rclone lsjson ou session rcd)"""
+        started = time.monotonic()
+        try:
+            result = get_backend().lsjson(self.root, recursive=self.recursive)
+        except Exception as e:
+            self.log(f"⚠️ Listing du Drive impossible: {e}")
+            return False
+        finally:
+            # Listings rclone lancés et leur durée (mesures des exécutions qui partagent l'index)
+            self.listings += 1
+            self.listing_seconds += time.monotonic() - started
+
+        if result.returncode != 0:
+            # Dossier inexistant : l'index est simplement vide
+            if "directory not found" in result.stderr:
+                files = {}
+            else:
+                self.log(f"⚠️ Listing du Drive en échec (code {result.returncode})")
+                self.log(f"   {result.stderr[:200]}")
+                return False
+        else:
+            try:
+                entries = json.loads(result.stdout or "[]")
+            except ValueError:
+                self.log("⚠️ Listing du Drive invalide")
+                return False
+            files = {e["Path"]: {"size": e.get("Size", -1), "modtime": e.get("ModTime", "")} for e in entries}
+
+        with self._lock:
+            self.files = files
+            self.loaded_at = time.time()
+            self._save_cache()
+        self.log(f"   📇 Index Drive: {len(files)} fichier(s) dans {self.root}")
+        return True
+
+    def ensure_loaded(self, force=False):
+        """Charge l'index (cache disque si valide, sinon listing rclone)"""
+        with self._load_lock:
+            if self.loaded_at and not force and time.time() - self.loaded_at <= self.ttl:
+                return True
+            if not force and self._load_cache():
+                return True
+            if self.refresh():
+                return True
+            # Pas de nouvelle tentative à chaque recherche : on garde l'index vide
+            # jusqu'au prochain refresh explicite
+            self.loaded_at = time.time()
+            return False
+
+    def contains(self, name, size=None):
+        """Test d'existence en O(1), avec vérification optionnelle de la taille"""
+        self.ensure_loaded()
+        entry = self.files.get(name)
+        if entry is None:
+            return False
+        return size is None or entry.get("size", -1) in (-1, size)
+
+    def add(self, name, size, modtime=""):
+        """Enregistre un fichier qui vient d'être uploadé"""
+        with self._lock:
+            self.files[name] = {"size": size, "modtime": modtime or time.strftime("%Y-%m-%dT%H:%M:%S")}
+            self._save_cache()
+
+    def add_many(self, sizes):
+        """Enregistre des fichiers uploadés ensemble ({nom: taille}), une seule sauvegarde"""
+        modtime = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock:
+            for name, size in sizes.items():
+                self.files[name] = {"size": size, "modtime": modtime}
+            self._save_cache()
+
+    def verify(self, names):
+        """Met à jour l'index pour quelques fichiers seulement (sans lister tout le dossier) ;
+        False si la vérification a échoué (l'index est alors inchangé)"""
+        try:
+            result = get_backend().lsjson_files(self.root, list(names))
+        except Exception as e:
+            self.log(f"⚠️ Vérification sur le Drive impossible: {e}")
+            return False
+        if result.returncode != 0:
+            self.log(f"⚠️ Vérification sur le Drive en échec (code {result.returncode}): {result.stderr[:200]}")
+            return False
+        try:
+            found = {e["Path"]: {"size": e.get("Size", -1), "modtime": e.get("ModTime", "")}
+                     for e in json.loads(result.stdout or "[]")}
+        except ValueError:
+            self.log("⚠️ Vérification sur le Drive invalide")
+            return False
+        with self._lock:
+            for name in names:
+                if name in found:
+                    self.files[name] = found[name]
+                else:
+                    self.files.pop(name, None)
+            self._save_cache()
+        return True
+
+    def move(self, old, new):
+        """Renomme un fichier côté serveur (rclone moveto, sans retransfert)"""
+        base = f"{self.root}/" if self.remote_path else self.root
+        try:
+            result = get_backend().moveto(base + old, base + new)
+        except Exception as e:
+            self.log(f"⚠️ Renommage sur le Drive impossible: {e}")
+            return False
+        if result.returncode != 0:
+            self.log(f"⚠️ Renommage sur le Drive en échec (code {result.returncode}): {result.stderr[:200]}")
+            return False
+        with self._lock:
+            entry = self.files.pop(old, None) or {"size": -1, "modtime": ""}
+            self.files[new] = entry
+            self._save_cache()
+        return True
+
+    def discard(self, name):
+        with self._lock:
+            if self.files.pop(name, None) is not None:
+                self._save_cache()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_remote_index(remote, remote_path, **kwargs):
+    """Retourne l'index partagé pour un remote:chemin donné"""
+    key = (remote, remote_path.strip("/"))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = RemoteIndex(remote, remote_path, **kwargs)
+        return _indexes[key]
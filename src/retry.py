@@ -0,0 +1,169 @@
+import random
+import re
+import threading
+import time
+
+# Catégories d'échec d'un processus yt-dlp / rclone
+TRANSIENT = "transient"        # réseau, 5xx, coupure : on réessaie
+RATE_LIMITED = "rate_limited"  # 429, quota, "not a bot" : on réessaie plus tard, moins vite
+PERMANENT = "permanent"        # vidéo supprimée/privée, format absent... : inutile de réessayer
+
+LABELS = {TRANSIENT: "erreur temporaire", RATE_LIMITED: "débit limité", PERMANENT: "erreur définitive"}
+
+# Attente avant un nouvel essai (secondes) : base * 2^(essai-1), plafonnée, avec jitter
+BACKOFF = 2
+RATE_LIMIT_BACKOFF = 30
+BACKOFF_MAX = 600
+
+# Lancements par seconde et rafale autorisés par hôte (youtube, remote rclone...)
+HOST_RATE = 2.0
+HOST_BURST = 4
+
+_RATE_LIMITED_RE = re.compile(
+    r"HTTP Error 429|Too Many Requests|rate.?limit|quota exceeded|"
+    r"confirm you.re not a bot|try again later",
+    re.IGNORECASE
+)
+_PERMANENT_RE = re.compile(
+    r"Video unavailable|Private video|has been removed|members.only|not available in your country|"
+    r"Unsupported URL|copyright|account .*terminated|Requested format is not available|"
+    r"HTTP Error 40[034]|HTTP Error 410|storageQuotaExceeded|storage quota|"
+    r"directory not found|Failed to create file system|didn't find section|"
+    r"Permission denied|No such file",
+    re.IGNORECASE
+)
+
+
+def classify_failure(output):
+    """Catégorie d'un échec d'après la sortie du processus (par défaut : temporaire)"""
+    output = output or ""
+    if _RATE_LIMITED_RE.search(output):
+        return RATE_LIMITED
+    if _PERMANENT_RE.search(output):
+        return PERMANENT
+    return TRANSIENT
+
+
+def error_excerpt(output, width=120):
+    """Dernière ligne d'erreur utile d'une sortie, pour le log"""
+    lines = [l.strip() for l in (output or "").splitlines() if l.strip()]
+    errors = [l for l in lines if "ERROR" in l.upper()] or lines
+    return errors[-1][:width] if errors else ""
+
+
+def backoff_delay(attempt, category=TRANSIENT):
+    """Attente avant l'essai n° `attempt` (1, 2, ...) : exponentielle, moitié fixe + moitié aléatoire"""
+    base = RATE_LIMIT_BACKOFF if category == RATE_LIMITED else BACKOFF
+    delay = min(BACKOFF_MAX, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def wait(seconds, should_stop=lambda: False):
+    """Attend `seconds` ; False si un arrêt est demandé entre-temps"""
+    deadline = time.monotonic() + seconds
+    while not should_stop():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(remaining, 0.5))
+    return False
+
+
+class TokenBucket:
+    """Limite le rythme des lancements vers un hôte ; penalize() le suspend après un 429"""
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.penalties = 0  # ralentissements demandés par l'hôte (429, quota...)
+        self._lock = threading.Lock()
+
+    def acquire(self, should_stop=lambda: False):
+        """Prend un jeton (attend si besoin) ; False si un arrêt est demandé"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            if not wait(min(delay, 1.0), should_stop):
+                return False
+
+    def penalize(self, seconds):
+        """Plus aucun lancement vers cet hôte pendant `seconds`"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.penalties += 1
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def host_bucket(host):
+    """Seau partagé par tous les moteurs du processus pour un même hôte"""
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket()
+        return _buckets[host]
+
+
+class AdaptiveLimit:
+    """Nombre de tâches simultanées : divisé par deux quand l'hôte limite le débit,
+    remonté d'une unité après `recover_after` succès consécutifs (jusqu'à `target`)."""
+
+    def __init__(self, maximum, recover_after=5, name="", log=print):
+        self.maximum = max(1, maximum)
+        self.target = self.maximum  # valeur visée (réglée par l'autotune, sinon le maximum)
+        self.limit = self.maximum
+        self.recover_after = recover_after
+        self.name = name
+        self.log = log
+        self.active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, should_stop=lambda: False):
+        with self._cond:
+            while self.active >= self.limit:
+                if should_stop():
+                    return False
+                self._cond.wait(timeout=0.5)
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def throttled(self):
+        with self._cond:
+            self._successes = 0
+            if self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                self.log(f"🐢 Débit limité : {self.limit} {self.name} simultané(s) au plus")
+
+    def succeeded(self):
+        with self._cond:
+            self._successes += 1
+            if self.limit < self.target and self._successes >= self.recover_after:
+                self._successes = 0
+                self.limit += 1
+                self.log(f"🐇 {self.limit} {self.name} simultané(s) au plus")
+                self._cond.notify_all()
+
+    def set_target(self, value):
+        """Nouvelle valeur visée (bornée par le maximum), appliquée tout de suite"""
+        with self._cond:
+            self.target = min(self.maximum, max(1, value))
+            self.limit = self.target
+            self._successes = 0
+            self._cond.notify_all()
@@ -0,0 +1,159 @@
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from metrics import Metrics
+
+from retry import LABELS, PERMANENT, RATE_LIMITED, AdaptiveLimit, backoff_delay, classify_failure, error_excerpt, wait
+
+
+def video_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+class DownloadScheduler:
+    """Lance un yt-dlp par vidéo, avec un nombre limité de téléchargements simultanés.
+
+    Une vidéo en échec est retentée seule (jusqu'à `retries` fois) si l'erreur n'est pas
+    définitive ; le nombre de téléchargements simultanés baisse quand YouTube limite le débit.
+    """
+
+    def __init__(self, base_cmd, out_dir, concurrency=3, on_start=None, on_line=None, on_done=None,
+                 should_stop=lambda: False, name_suffix="", slots=None, before_start=None,
+                 retries=0, bucket=None, cached_input=None, metrics=None, log=print):
+        self.base_cmd = list(base_cmd)
+        self.out_dir = out_dir
+        self.name_suffix = name_suffix
+        # Sémaphore partagé avec d'autres jobs (limite globale de yt-dlp simultanés)
+        self.slots = slots
+        # before_start(entry) -> False pour ne pas lancer la vidéo (ex: attente du budget disque)
+        self.before_start = before_start
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        # Seau de jetons de l'hôte (rythme des lancements, suspendu après un 429)
+        self.bucket = bucket
+        self.limit = AdaptiveLimit(self.concurrency, name="téléchargement(s)", log=log)
+        # cached_input(entry) -> arguments remplaçant l'URL (infos déjà extraites) ou None ;
+        # appelé à chaque essai
+        self.cached_input = cached_input
+        self.metrics = metrics or Metrics()
+        self.on_start = on_start or (lambda entry: None)
+        self.on_line = on_line or (lambda entry, line: None)
+        # on_done(entry, code, catégorie de la dernière erreur ou None)
+        self.on_done = on_done or (lambda entry, code, category: None)
+        self.should_stop = should_stop
+        self.log = log
+        self.stopped = False
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def output_template(self, entry):
+        # Même nommage que le mode playlist classique : "%(playlist_index)03d - %(title)s"
+        return str(self.out_dir / f"{entry.index:03d} - %(title)s{self.name_suffix}.%(ext)s")
+
+    def run(self, entries):
+        """Télécharge toutes les entrées, retourne {video_id: code retour (None si non lancé)}"""
+        entries = list(entries)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            codes = list(pool.map(self._run_one, entries))
+        return {e.video_id: code for e, code in zip(entries, codes)}
+
+    def stop(self):
+        """Arrête les téléchargements en cours et n'en lance plus de nouveaux"""
+        with self._lock:
+            self.stopped = True
+            processes = list(self._processes)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _stopping(self):
+        return self.stopped or self.should_stop()
+
+    def _run_one(self, entry):
+        # Attente éventuelle avant de prendre une place de téléchargement
+        if self.before_start and not self.before_start(entry):
+            return None
+        attempt = 0
+        category = None
+        while True:
+            if not self.limit.acquire(self._stopping):
+                return None
+            try:
+                if self.bucket and not self.bucket.acquire(self._stopping):
+                    return None
+                with self.slots or nullcontext():
+                    code, output, cached = self._download(entry)
+            finally:
+                self.limit.release()
+            if code is None or self.stopped:
+                return code
+            if code == 0:
+                self.limit.succeeded()
+                break
+            if cached:
+                # Infos en cache refusées (liens expirés...) : nouvel essai tout de suite, avec extraction
+                self.log(f"🔁 [{entry.index:03d}] Infos en cache refusées, nouvelle extraction")
+                continue
+
+            category = classify_failure(output)
+            attempt += 1
+            delay = backoff_delay(attempt, category)
+            if category == RATE_LIMITED:
+                self.limit.throttled()
+                if self.bucket:
+                    self.bucket.penalize(delay)
+            if category == PERMANENT or attempt > self.retries:
+                break
+            self.log(f"🔁 [{entry.index:03d}] {LABELS[category]} ({error_excerpt(output)}), "
+                     f"nouvel essai {attempt}/{self.retries} dans {delay:.0f}s")
+            self.metrics.add("retries")
+            if not wait(delay, self._stopping):
+                return None
+
+        self.on_done(entry, code, category)
+        if code != 0:
+            self.log(f"⚠️ [{entry.index:03d}] yt-dlp a échoué (code {code}, {LABELS[category]}): "
+                     f"{error_excerpt(output)}")
+        return code
+
+    def _download(self, entry):
+        """Un essai ; retourne (code retour ou None si non lancé, dernières lignes de sortie,
+        infos en cache utilisées)"""
+        if self._stopping():
+            return None, "", False
+
+        self.on_start(entry)
+        cached = self.cached_input(entry) if self.cached_input else None
+        cmd = self.base_cmd + ["-o", self.output_template(entry)] + (cached or ["--", video_url(entry.video_id)])
+        with self.metrics.timer("download"):
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True
+            )
+            self.metrics.spawn("yt-dlp")
+            with self._lock:
+                self._processes.add(process)
+                self.metrics.gauge("downloads", len(self._processes))
+            tail = deque(maxlen=20)  # pour classer l'erreur éventuelle
+            try:
+                for line in process.stdout:
+                    if self.should_stop():
+                        self.stop()
+                        break
+                    tail.append(line)
+                    self.on_line(entry, line)
+                process.wait()
+            finally:
+                with self._lock:
+                    self._processes.discard(process)
+                    self.metrics.gauge("downloads", len(self._processes))
+        return process.returncode, "".join(tail), bool(cached)
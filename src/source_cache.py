@@ -0,0 +1,144 @@
+import hashlib
+import json
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from progress import format_bytes
+
+# Modes de découpe locale
+CUT_FAST = "fast"  # copie des flux, coupe sur l'image clé la plus proche
+CUT_ACCURATE = "accurate"  # ré-encodage, coupe à l'image près
+CUT_MODES = (CUT_FAST, CUT_ACCURATE)
+
+
+def format_key(format_selector):
+    """Clé courte d'un sélecteur de format yt-dlp"""
+    return hashlib.sha1(format_selector.encode("utf-8")).hexdigest()[:8]
+
+
+class SourceCache:
+    """Cache local des vidéos sources complètes (ID + format), limité en taille (LRU).
+
+    Plusieurs découpes d'une même vidéo réutilisent la source locale au lieu de la retélécharger.
+    """
+
+    def __init__(self, cache_dir, max_bytes=20 * 1024 ** 3, log=print):
+        self.dir = Path(cache_dir) / "sources"
+        self.index_path = self.dir / "index.json"
+        self.max_bytes = max_bytes
+        self.log = log
+        self.items = {}  # clé -> {"file", "size", "last_used"}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.items = json.load(f)
+        except (OSError, ValueError):
+            self.items = {}
+        # Oublier les fichiers supprimés à la main
+        self.items = {k: v for k, v in self.items.items() if (self.dir / v["file"]).is_file()}
+
+    def _save(self):
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.items, f)
+            tmp.replace(self.index_path)
+        except OSError as e:
+            self.log(f"⚠️ Index du cache source non sauvegardé: {e}")
+
+    def key(self, video_id, format_selector):
+        return f"{video_id}_{format_key(format_selector)}"
+
+    def download_template(self, video_id, format_selector):
+        """Modèle -o yt-dlp pour télécharger une source directement dans le cache"""
+        return str(self.dir / f"{self.key(video_id, format_selector)}.%(ext)s")
+
+    def get(self, video_id, format_selector):
+        """Chemin de la source en cache, ou None"""
+        key = self.key(video_id, format_selector)
+        with self._lock:
+            item = self.items.get(key)
+            if not item:
+                return None
+            path = self.dir / item["file"]
+            if not path.is_file():
+                del self.items[key]
+                self._save()
+                return None
+            item["last_used"] = time.time()
+            self._save()
+            return path
+
+    def add(self, video_id, format_selector, path):
+        """Enregistre une source téléchargée dans le cache, puis libère de la place si besoin"""
+        path = Path(path)
+        key = self.key(video_id, format_selector)
+        with self._lock:
+            if path.parent.resolve() != self.dir.resolve():
+                self.dir.mkdir(parents=True, exist_ok=True)
+                target = self.dir / f"{key}{path.suffix}"
+                path.replace(target)
+                path = target
+            self.items[key] = {"file": path.name, "size": path.stat().st_size, "last_used": time.time()}
+            self._evict(keep=key)
+            self._save()
+            return path
+
+    def total_size(self):
+        with self._lock:
+            return sum(item["size"] for item in self.items.values())
+
+    def _evict(self, keep=None):
+        """Supprime les sources les moins récemment utilisées au-delà de max_bytes"""
+        total = sum(item["size"] for item in self.items.values())
+        for key in sorted(self.items, key=lambda k: self.items[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            item = self.items.pop(key)
+            try:
+                (self.dir / item["file"]).unlink()
+            except OSError:
+                pass
+            total -= item["size"]
+            self.log(f"🧹 Cache source: {item['file']} supprimé ({format_bytes(item['size'])})")
+
+
+def cut_command(ffmpeg, source, start, end, dest, mode=CUT_FAST, audio_only=False):
+    """Commande ffmpeg de découpe locale de [start, end] secondes"""
+    cmd = [str(ffmpeg), "-hide_banner", "-loglevel", "error", "-y",
+           # Recherche rapide dans l'entrée, puis durée relative au point de départ
+           "-ss", str(start), "-i", str(source), "-t", str(max(0, end - start))]
+    if audio_only:
+        cmd += ["-vn", "-c:a", "libmp3lame", "-q:a", "2"]
+    elif mode == CUT_ACCURATE:
+        cmd += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-c:a", "aac", "-b:a", "192k"]
+    else:
+        cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    if not audio_only:
+        cmd += ["-movflags", "+faststart"]
+    return cmd + [str(dest)]
+
+
+def cut_local(ffmpeg, source, start, end, dest, mode=CUT_FAST, audio_only=False, log=print):
+    """Découpe une source locale avec ffmpeg ; retourne True si le fichier a été produit"""
+    dest = Path(dest)
+    tmp = dest.with_name(f"{dest.stem}.part{dest.suffix}")
+    result = subprocess.run(
+        cut_command(ffmpeg, source, start, end, tmp, mode=mode, audio_only=audio_only),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0 or not tmp.is_file():
+        log(f"❌ ffmpeg a échoué (code {result.returncode}): {result.stderr.strip()[:200]}")
+        tmp.unlink(missing_ok=True)
+        return False
+    tmp.replace(dest)
+    return True
@@ -0,0 +1,173 @@
+import threading
+from pathlib import Path
+
+from progress import format_bytes
+
+# Préfixe des lignes de taille estimée émises par yt-dlp avant chaque téléchargement
+SIZE_MARKER = "[taille] "
+
+# Taille approximative du format choisi et durée, pour estimer la taille de la plage découpée
+SIZE_ARGS = [
+    "--print",
+    "before_dl:" + SIZE_MARKER
+    + "%(id)s\t%(filesize_approx)s\t%(duration)s\t%(section_start)s\t%(section_end)s",
+]
+
+
+def _number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_size_line(line):
+    """Décode une ligne SIZE_MARKER -> (video_id, plage (début, fin), taille estimée en octets ou None)"""
+    parts = line[len(SIZE_MARKER):].strip().split("\t")
+    video_id = parts[0]
+    size, duration, start, end = (_number(p) for p in (parts[1:] + [None] * 4)[:4])
+    section = (start, end)
+    if not size:
+        return video_id, section, None
+    if duration and end is not None:
+        # Seule la plage [start, end] est téléchargée
+        size *= max(0.0, min(end, duration) - (start or 0)) / duration
+    return video_id, section, int(size)
+
+
+class StagingBudget:
+    """Budget d'espace local : fichiers téléchargés mais pas encore uploadés et supprimés.
+
+    acquire() bloque avant chaque nouveau téléchargement tant que le budget (octets et/ou
+    nombre de fichiers) serait dépassé. Les téléchargements en cours comptent pour leur
+    taille estimée (filesize_approx, ou moyenne des vidéos précédentes).
+    """
+
+    def __init__(self, max_bytes=0, max_files=0, log=print):
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.log = log
+        self.items = {}  # clé -> {"estimate", "sections": {plage: taille}, "files": {chemin: taille}, "done"}
+        self.peak_bytes = 0  # maximum réellement présent sur le disque
+        self._done_bytes = 0
+        self._done_count = 0
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self):
+        return bool(self.max_bytes or self.max_files)
+
+    def _item(self, key):
+        return self.items.setdefault(key, {"estimate": None, "sections": {}, "files": {}, "done": False})
+
+    def _average(self):
+        return self._done_bytes // self._done_count if self._done_count else 0
+
+    def _item_bytes(self, item):
+        files = sum(item["files"].values())
+        if item["done"]:
+            return files
+        estimate = item["estimate"] if item["estimate"] is not None else self._average()
+        return max(estimate, files)
+
+    def _usage(self):
+        used = sum(self._item_bytes(item) for item in self.items.values())
+        count = sum(len(item["files"]) if item["done"] else max(1, len(item["files"]))
+                    for item in self.items.values())
+        return used, count
+
+    def usage(self):
+        """(octets, fichiers) occupés ou réservés en local"""
+        with self._cond:
+            return self._usage()
+
+    def describe(self):
+        """"1.2 Go / 5.0 Go, 3 / 10 fichier(s)" """
+        with self._cond:
+            return self._describe()
+
+    def _describe(self):
+        used, count = self._usage()
+        parts = []
+        if self.max_bytes:
+            parts.append(f"{format_bytes(used)} / {format_bytes(self.max_bytes)}")
+        if self.max_files:
+            parts.append(f"{count} / {self.max_files} fichier(s)")
+        return ", ".join(parts)
+
+    def _over(self):
+        if not self._done_count and any(
+            not item["done"] and item["estimate"] is None and not item["files"] for item in self.items.values()
+        ):
+            # Taille encore inconnue (ni estimation ni moyenne) : une vidéo à la fois
+            return True
+        used, count = self._usage()
+        if self.max_bytes and used + self._average() > self.max_bytes:
+            return True
+        return bool(self.max_files and count + 1 > self.max_files)
+
+    def acquire(self, key, should_stop=lambda: False):
+        """Attend qu'il y ait de la place puis réserve celle d'une vidéo ; False si arrêt demandé"""
+        with self._cond:
+            waited = False
+            # Toujours laisser passer une vidéo quand rien n'est en attente (pas de blocage)
+            while self.enabled and self.items and self._over():
+                if should_stop():
+                    return False
+                if not waited:
+                    self.log(f"⏳ Budget disque atteint ({self._describe()}), attente des uploads...")
+                    waited = True
+                self._cond.wait(timeout=1)
+            if should_stop():
+                return False
+            self._item(key)
+            return True
+
+    def estimate(self, key, size, section=None):
+        """Taille estimée d'une plage en cours de téléchargement (cumulée si plusieurs plages).
+
+        Une plage annoncée à nouveau (nouvel essai du téléchargement) remplace sa réservation.
+        """
+        with self._cond:
+            item = self._item(key)
+            item["sections"][section] = size
+            item["estimate"] = sum(item["sections"].values())
+
+    def add_file(self, key, path):
+        """Fichier produit en local, compté jusqu'à release()"""
+        path = Path(path)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+        with self._cond:
+            item = self._item(key)
+            item["files"][path] = size
+            on_disk = sum(sum(i["files"].values()) for i in self.items.values())
+            self.peak_bytes = max(self.peak_bytes, on_disk)
+
+    def finish(self, key):
+        """Téléchargement d'une vidéo terminé (réussi ou non) : seule la taille réelle compte"""
+        with self._cond:
+            item = self.items.get(key)
+            if not item or item["done"]:
+                return
+            item["done"] = True
+            if item["files"]:
+                self._done_bytes += sum(item["files"].values())
+                self._done_count += 1
+            else:
+                del self.items[key]
+            self._cond.notify_all()
+
+    def release(self, path):
+        """Fichier uploadé et supprimé (ou abandonné) : libère sa place"""
+        path = Path(path)
+        with self._cond:
+            for key, item in list(self.items.items()):
+                if path in item["files"]:
+                    del item["files"][path]
+                    if item["done"] and not item["files"]:
+                        del self.items[key]
+                    self._cond.notify_all()
+                    return
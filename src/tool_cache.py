@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+
+class ToolCache:
+    """Infos sur les outils externes (remotes rclone, versions de yt-dlp et ffmpeg) gardées sur disque.
+
+    L'interface s'affiche tout de suite avec les dernières valeurs connues ; les sondes
+    (processus externes, parfois lents) tournent en tâche de fond et mettent le cache à jour.
+    """
+
+    def __init__(self, cache_file, probes, log=print):
+        self.cache_file = Path(cache_file)
+        self.probes = probes  # nom -> fonction sans argument (None = pas de réponse)
+        self.log = log
+        self.values = {}
+        self.checked_at = 0
+
+    def load(self):
+        """Dernières valeurs connues (vide au premier lancement)"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.values = data.get("values", {})
+            self.checked_at = data.get("checked_at", 0)
+        except (OSError, ValueError):
+            pass
+        return dict(self.values)
+
+    def _save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"checked_at": self.checked_at, "values": self.values}, f)
+            tmp.replace(self.cache_file)
+        except OSError as e:
+            self.log(f"⚠️ Erreur lors de la sauvegarde du cache des outils: {e}")
+
+    def refresh(self):
+        """Lance toutes les sondes en parallèle ; retourne ({nom: valeur}, {nom: durée})"""
+        results = {}
+        timings = {}
+
+        def run(name, probe):
+            started = time.monotonic()
+            try:
+                results[name] = probe()
+            except Exception as e:
+                self.log(f"⚠️ Vérification de {name} impossible: {e}")
+                results[name] = None
+            timings[name] = time.monotonic() - started
+
+        threads = [threading.Thread(target=run, args=item, daemon=True) for item in self.probes.items()]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Pas de réponse (délai dépassé...) : la dernière valeur connue est gardée
+        self.values.update({name: value for name, value in results.items() if value is not None})
+        self.checked_at = time.time()
+        self._save()
+        return results, timings
+
+    def refresh_async(self, on_done):
+        """refresh() en tâche de fond ; on_done(résultats, durées) est appelé dans ce thread"""
+        thread = threading.Thread(target=lambda: on_done(*self.refresh()), daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,294 @@
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from metrics import Metrics
+from rclone_backend import count_call, get_backend
+from retry import LABELS, PERMANENT, RATE_LIMITED, AdaptiveLimit, backoff_delay, classify_failure, error_excerpt, host_bucket, wait
+
+
+class Uploader:
+    """Moteur d'upload rclone : pool de copies parallèles ou copie groupée (--files-from).
+
+    Un upload en échec est retenté (jusqu'à `retries` fois) si l'erreur n'est pas définitive ;
+    quand le remote limite le débit (quota Drive, 429), moins d'uploads tournent en même temps.
+    """
+
+    def __init__(self, remote, remote_path, index, workers=4, bulk=False, transfers=4, slots=None,
+                 retries=0, should_stop=lambda: False, metrics=None, log=print):
+        self.remote = remote
+        self.remote_path = remote_path
+        self.index = index
+        self.workers = max(1, workers)
+        self.bulk = bulk
+        self.transfers = max(1, transfers)
+        # Sémaphore partagé avec d'autres jobs (limite globale de rclone simultanés)
+        self.slots = slots
+        self.retries = retries
+        # Pause ou arrêt du moteur : interrompt l'attente avant un nouvel essai
+        self.should_stop = should_stop
+        # Rythme des lancements rclone vers ce remote, partagé par tous les jobs
+        self.bucket = host_bucket(f"rclone:{remote}")
+        self.limit = AdaptiveLimit(self.workers, name="upload(s)", log=log)
+        self.metrics = metrics or Metrics()
+        self.log = log
+
+    @property
+    def dest(self):
+        return f"{self.remote}:{self.remote_path}" if self.remote_path else f"{self.remote}:"
+
+    def upload_file(self, file_path):
+        """Upload un fichier vers le remote, retourne True s'il y est bien présent"""
+        try:
+            file_path = Path(file_path)
+            file_name = file_path.name
+            size = file_path.stat().st_size
+
+            # Vérifier si le fichier existe déjà
+            if self.index.contains(file_name):
+                self.log(f"⏭️ Fichier déjà présent, skip: {file_name}")
+                return True
+
+            self.log(f"☁️ Upload vers {self.remote}: {file_name}")
+            self.log(f"   Taille: {size / (1024*1024):.2f} MB")
+
+            attempt = 0
+            while True:
+                process = self._rclone("copy_file", file_path, self.dest)
+                if process is None:
+                    # Pas un échec : le fichier reste à uploader au prochain lancement
+                    self.log(f"⏸️ Upload interrompu: {file_name}")
+                    return False
+                if process.returncode == 0:
+                    self.log(f"✅ Upload terminé: {file_name}")
+                    self.index.add(file_name, size)
+                    self.metrics.add("files_uploaded")
+                    self.metrics.add("bytes_uploaded", size)
+                    return True
+
+                category = self._failed(process)
+                attempt += 1
+                if category == PERMANENT or attempt > self.retries:
+                    self.log(f"❌ Échec de l'upload: {file_name} ({LABELS[category]})")
+                    self.log(f"   Erreur: {process.stderr}")
+                    self.metrics.add("files_failed")
+                    return False
+                delay = backoff_delay(attempt, category)
+                self.log(f"🔁 {file_name}: {LABELS[category]} ({error_excerpt(process.stderr)}), "
+                         f"nouvel essai {attempt}/{self.retries} dans {delay:.0f}s")
+                self.metrics.add("retries")
+                if not wait(delay, self.should_stop):
+                    self.log(f"⏸️ Upload interrompu: {file_name}")
+                    return False
+
+        except Exception as e:
+            # Fichier supprimé ou renommé entre la découpe et l'upload...
+            self.log(f"❌ Erreur d'upload: {e}")
+            self.metrics.add("files_failed")
+            return False
+
+    def _rclone(self, operation, *args):
+        """Opération rclone (processus ou session rcd) sous les limites globale, adaptative et par remote ;
+        None si un arrêt est demandé pendant l'attente (remote suspendu après un 429)"""
+        if not self.limit.acquire(self.should_stop):
+            return None
+        try:
+            if not self.bucket.acquire(self.should_stop):
+                return None
+            with self.slots or nullcontext(), self.metrics.timer("upload"):
+                count_call(self.metrics)
+                process = getattr(get_backend(), operation)(*args)
+        finally:
+            self.limit.release()
+        if process.returncode == 0:
+            self.limit.succeeded()
+        return process
+
+    def _failed(self, process):
+        """Catégorie de l'échec ; un remote qui limite le débit est ralenti"""
+        category = classify_failure(process.stderr)
+        if category == RATE_LIMITED:
+            self.limit.throttled()
+            self.bucket.penalize(backoff_delay(1, category))
+        return category
+
+    def upload_batch(self, files):
+        """Upload une liste de fichiers, retourne {fichier: True/False} pour chacun"""
+        files = [Path(f) for f in files]
+        if self.bulk:
+            return self._upload_bulk(files)
+        return self._upload_pool(files)
+
+    def _upload_pool(self, files):
+        if self.workers == 1 or len(files) <= 1:
+            return {f: self.upload_file(f) for f in files}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(files, pool.map(self.upload_file, files)))
+
+    def _upload_bulk(self, files):
+        results = {}
+        pending = defaultdict(list)
+        sizes = {}
+        for f in files:
+            if self.index.contains(f.name):
+                self.log(f"⏭️ Fichier déjà présent, skip: {f.name}")
+                results[f] = True
+                continue
+            try:
+                sizes[f] = f.stat().st_size
+            except OSError as e:
+                # Supprimé ou renommé entre la découpe et l'upload : les autres fichiers partent quand même
+                self.log(f"❌ Fichier introuvable, non uploadé: {f.name} ({e})")
+                self.metrics.add("files_failed")
+                results[f] = False
+                continue
+            pending[f.parent].append(f)
+
+        # Un seul "rclone copy" par dossier source ; les essais suivants ne reprennent que les manquants
+        for src_dir, group in pending.items():
+            attempt = 0
+            while group:
+                total = sum(sizes[f] for f in group)
+                self.log(f"☁️ Upload groupé vers {self.remote}: {len(group)} fichier(s), {total / (1024*1024):.2f} MB")
+
+                try:
+                    process = self._rclone("copy_files", src_dir, [f.name for f in group], self.dest, self.transfers)
+                    if process is None:
+                        for f in group:
+                            results[f] = False
+                        self.log(f"⏸️ Upload interrompu: {len(group)} fichier(s) restent à uploader")
+                        break
+                except Exception as e:
+                    self.log(f"❌ Erreur d'upload groupé: {e}")
+                    process = None
+
+                if process is not None and process.returncode == 0:
+                    # rclone confirme la copie de tout le groupe : pas de listing
+                    self.index.add_many({f.name: sizes[f] for f in group})
+                else:
+                    if process is not None:
+                        self.log(f"⚠️ rclone a signalé des erreurs (code {process.returncode})")
+                        self.log(f"   {process.stderr[-500:]}")
+                    # Vérification des seuls fichiers du groupe, pas de tout le dossier
+                    count_call(self.metrics)
+                    self.index.verify([f.name for f in group])
+                missing = []
+                for f in group:
+                    if self.index.contains(f.name, size=sizes[f]):
+                        results[f] = True
+                        self.log(f"✅ Upload terminé: {f.name}")
+                        self.metrics.add("files_uploaded")
+                        self.metrics.add("bytes_uploaded", sizes[f])
+                    else:
+                        missing.append(f)
+                if not missing:
+                    break
+
+                category = self._failed(process) if process is not None else PERMANENT
+                attempt += 1
+                if category == PERMANENT or attempt > self.retries:
+                    for f in missing:
+                        results[f] = False
+                        self.log(f"❌ Échec de l'upload: {f.name}")
+                    self.metrics.add("files_failed", len(missing))
+                    break
+                delay = backoff_delay(attempt, category)
+                self.log(f"🔁 {len(missing)} fichier(s) non uploadé(s): {LABELS[category]}, "
+                         f"nouvel essai {attempt}/{self.retries} dans {delay:.0f}s")
+                self.metrics.add("retries")
+                if not wait(delay, self.should_stop):
+                    for f in missing:
+                        results[f] = False
+                    self.log(f"⏸️ Upload interrompu: {len(missing)} fichier(s) restent à uploader")
+                    break
+                group = missing
+
+        return results
+
+
+class UploadPipeline:
+    """Étape d'upload alimentée au fil de l'eau par une file bornée"""
+
+    _STOP = object()
+
+    def __init__(self, uploader, delete_local=False, max_pending=None, batch_size=10, on_done=None, log=print):
+        self.uploader = uploader
+        self.delete_local = delete_local
+        # Appelé pour chaque fichier : on_done(fichier, uploadé, supprimé)
+        self.on_done = on_done or (lambda file_path, ok, deleted: None)
+        self.batch_size = batch_size
+        self.log = log
+        # File bornée : quand elle est pleine, submit() bloque et freine yt-dlp
+        self.queue = queue.Queue(maxsize=max_pending or uploader.workers + 1)
+        self.results = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for _ in range(self.uploader.workers if not self.uploader.bulk else 1):
+            t = threading.Thread(target=self._worker, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, file_path):
+        metrics = self.uploader.metrics
+        # Temps passé bloqué quand la file est pleine (yt-dlp freiné par l'upload)
+        with metrics.timer("upload_backpressure"):
+            self.queue.put(Path(file_path))
+        metrics.gauge("upload_queue", self.queue.qsize())
+
+    def close(self):
+        """Attend la fin des uploads en cours, retourne {fichier: True/False}"""
+        for _ in self._threads:
+            self.queue.put(self._STOP)
+        for t in self._threads:
+            t.join()
+        return self.results
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                return
+            self.uploader.metrics.gauge("upload_queue", self.queue.qsize())
+            batch = [item]
+            stop = False
+            # En mode groupé, on regroupe ce qui est déjà arrivé dans la file
+            while self.uploader.bulk and len(batch) < self.batch_size:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is self._STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            try:
+                results = self.uploader.upload_batch(batch)
+            except Exception as e:
+                # Le worker doit continuer à vider la file, sinon submit() bloquerait pour toujours
+                self.log(f"❌ Erreur d'upload: {e}")
+                self.uploader.metrics.add("files_failed", len(batch))
+                results = {f: False for f in batch}
+            with self._lock:
+                self.results.update(results)
+            for f, ok in results.items():
+                deleted = False
+                if ok and self.delete_local:
+                    try:
+                        f.unlink()
+                        deleted = True
+                        self.log(f"🗑️ Supprimé: {f.name}")
+                    except Exception as e:
+                        self.log(f"❌ Erreur de suppression {f.name}: {e}")
+                try:
+                    self.on_done(f, ok, deleted)
+                except Exception as e:
+                    self.log(f"❌ Erreur après l'upload de {f.name}: {e}")
+            if stop:
+                return